@@ -1,6 +1,7 @@
 from django.contrib import admin
 from .models import User, CustomerProfile, SellerProfile
 from django.utils import timezone
+from products import listing
 
 @admin.register(User)
 class UserAdmin(admin.ModelAdmin):
@@ -21,13 +22,18 @@ class SellerProfileAdmin(admin.ModelAdmin):
     actions = ['verify_profiles', 'unverify_profiles']
     
     def verify_profiles(self, request, queryset):
+        # Bulk update skips model signals, so sync the product listing here
+        changed = list(queryset.filter(is_verified=False).values_list('id', flat=True))
         updated = queryset.update(is_verified=True, verified_at=timezone.now())
+        listing.seller_verification_changed(changed, True)
         self.message_user(request, f'{updated} profiles verified successfully.')
     
     verify_profiles.short_description = "Verify selected profiles"
     
     def unverify_profiles(self, request, queryset):
+        changed = list(queryset.filter(is_verified=True).values_list('id', flat=True))
         updated = queryset.update(is_verified=False, verified_at=None)
+        listing.seller_verification_changed(changed, False)
         self.message_user(request, f'{updated} profiles unverified.')
     
     unverify_profiles.short_description = "Unverify selected profiles"
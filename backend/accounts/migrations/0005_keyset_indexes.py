@@ -0,0 +1,17 @@
+# Generated by Django 5.2.18 on 2026-10-17 05:50
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounts', '0004_alter_sellerprofile_options_sellerprofile_updated_at_and_more'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='sellerprofile',
+            index=models.Index(fields=['created_at', 'id'], name='seller_created_id_idx'),
+        ),
+    ]
@@ -65,6 +65,9 @@ class SellerProfile(models.Model):
     updated_at = models.DateTimeField(auto_now=True)
     class Meta:
         ordering = ['-created_at']
+        indexes = [
+            models.Index(fields=['created_at', 'id'], name='seller_created_id_idx'),
+        ]
 
     def __str__(self):
         return self.store_name
@@ -8,6 +8,8 @@ from .models import SellerProfile, Address
 from rest_framework.permissions import IsAuthenticated
 from rest_framework.permissions import AllowAny
 from rest_framework import generics 
+from backend.pagination import KeysetPagination
+from cart.guest import guest_token, merge_guest_cart
 
 
 class RegisterView(APIView):
@@ -46,10 +48,17 @@ class LoginView(APIView):
         else:
             role = "CUSTOMER"
 
+        # Carry over whatever the visitor put in a guest cart
+        merged = 0
+        token = guest_token(request)
+        if token and role == "CUSTOMER":
+            merged = merge_guest_cart(token, user)
+
         return Response({
             "access": str(refresh.access_token),
             "refresh": str(refresh),
-            "role": role
+            "role": role,
+            "merged_cart_items": merged
         })
     
 class UserProfileView(APIView):
@@ -149,7 +158,15 @@ class AdminSellerListView(APIView):
     permission_classes = [IsAdminUser]
 
     def get(self, request):
-        sellers = SellerProfile.objects.all()
+        sellers = SellerProfile.objects.select_related('user')
+
+        paginator = None
+        if KeysetPagination.requested(request):
+            paginator = KeysetPagination()
+            sellers = paginator.paginate_queryset(sellers, request)
+        else:
+            sellers = sellers.order_by('-created_at', '-id')
+
         data = [
             {
                 "id": s.id,
@@ -159,6 +176,8 @@ class AdminSellerListView(APIView):
             }
             for s in sellers
         ]
+        if paginator:
+            return paginator.get_paginated_response(data)
         return Response(data)
 
 class AddressView(APIView):
@@ -111,6 +111,41 @@ DATABASES = {
     }
 }
 
+# Cache
+# Local memory is enough for a single process; point this at a shared
+# backend (Redis / Memcached) when running several workers so catalog
+# invalidation is seen by all of them.
+
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'LOCATION': 'eshop',
+    }
+}
+
+# Upper bound only; catalog pages are invalidated on every write
+CATALOG_CACHE_TIMEOUT = 60 * 15
+
+# Where working carts live: 'cart.storage.DatabaseCartStore' reads and writes
+# Cart / CartItem directly; 'cart.storage.CacheCartStore' keeps them in the
+# cache and writes them back in the background. Only switch to the cache store
+# with a cache shared by every process (Redis, Memcached): with the per-process
+# locmem cache above, each worker would see a different cart.
+CART_STORE = 'cart.storage.DatabaseCartStore'
+
+# Anonymous carts live in the cache only and expire after this many seconds
+# without a change
+GUEST_CART_TTL = 60 * 60 * 24 * 3
+
+# How long units reserved for checkout stay set aside (seconds)
+STOCK_HOLD_TTL = 60 * 10
+
+# How long checkout / cancel responses are kept for Idempotency-Key replays
+IDEMPOTENCY_KEY_TTL = 60 * 60 * 24
+
+# Customer carts untouched for this long are removed by sweep_abandoned_carts
+ABANDONED_CART_TTL = 60 * 60 * 24 * 30
+
 # Password validation
 # https://docs.djangoproject.com/en/5.2/ref/settings/#auth-password-validators
 
@@ -150,6 +185,13 @@ AUTH_USER_MODEL = 'accounts.User'
 
 STATIC_URL = 'static/'
 
+# Uploaded product images (content-addressed, see products/images.py)
+MEDIA_URL = '/media/'
+MEDIA_ROOT = BASE_DIR / 'media'
+
+# Threads resizing uploaded images in the background
+PRODUCT_IMAGE_WORKERS = 2
+
 # Default primary key field type
 # https://docs.djangoproject.com/en/5.2/ref/settings/#default-auto-field
 
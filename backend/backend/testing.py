@@ -0,0 +1,30 @@
+from django.core.cache import cache
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+
+class QueryCountMixin:
+    """
+    Assert that a read endpoint issues the same number of queries no
+    matter how many rows it returns (i.e. it has no N+1 lookups).
+
+    ``grow(n)`` must make sure ``n`` rows exist; ``fetch()`` performs the
+    request and returns the response.
+    """
+    query_count_sizes = (1, 5, 20)
+
+    def assertConstantQueries(self, grow, fetch, sizes=None):
+        counts = {}
+        for size in sizes or self.query_count_sizes:
+            grow(size)
+            cache.clear()
+            with CaptureQueriesContext(connection) as ctx:
+                response = fetch()
+            self.assertEqual(response.status_code, 200, getattr(response, 'data', None))
+            counts[size] = len(ctx)
+
+        self.assertEqual(
+            len(set(counts.values())), 1,
+            f"Query count grows with result size: {counts}"
+        )
+        return counts
@@ -0,0 +1,70 @@
+from products.holds import available_units
+from products.models import Product
+
+MAX_OPERATIONS = 200
+
+
+class CartPatchError(Exception):
+    def __init__(self, errors):
+        super().__init__(errors)
+        self.errors = errors
+
+
+def apply_cart_operations(store, user, operations):
+    """
+    Apply validated add / set / remove operations to the user's cart in
+    one locked mutation. Stock for every product involved is read with a
+    single query; if any resulting line exceeds the stock not held by other
+    customers the whole patch is rejected with CartPatchError and the cart
+    is left untouched.
+    """
+    product_ids = {op["product_id"] for op in operations}
+    # Guest carts are keyed by a token and have no holds of their own
+    customer = getattr(user, "customerprofile", None)
+    products = {
+        row["id"]: row
+        for row in Product.objects.filter(pk__in=product_ids, is_active=True)
+        .annotate(available=available_units(exclude_customer=customer))
+        .values("id", "price", "available")
+    }
+
+    errors = [
+        {"index": index, "product_id": op["product_id"], "error": "Product not available"}
+        for index, op in enumerate(operations)
+        if op["op"] != "remove" and op["product_id"] not in products
+    ]
+    if errors:
+        raise CartPatchError(errors)
+
+    def change(items):
+        for op in operations:
+            key = str(op["product_id"])
+            if op["op"] == "remove" or (op["op"] == "set" and op["quantity"] == 0):
+                items.pop(key, None)
+                continue
+
+            line = items.get(key)
+            if line is None:
+                line = items[key] = {
+                    "id": None,
+                    "quantity": 0,
+                    "price_at_time": str(products[op["product_id"]]["price"]),
+                }
+            if op["op"] == "add":
+                line["quantity"] += op["quantity"]
+            else:
+                line["quantity"] = op["quantity"]
+
+        short = [
+            {
+                "product_id": int(key),
+                "error": "Insufficient stock",
+                "available": products[int(key)]["available"],
+            }
+            for key, line in items.items()
+            if int(key) in products and line["quantity"] > products[int(key)]["available"]
+        ]
+        if short:
+            raise CartPatchError(short)
+
+    return store.mutate(user, change)
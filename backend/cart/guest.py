@@ -0,0 +1,38 @@
+from django.db import transaction
+
+from .storage import GuestCartNotFound, GuestCartStore, get_cart_store
+
+TOKEN_HEADER = "HTTP_X_CART_TOKEN"
+
+
+def guest_token(request):
+    return request.META.get(TOKEN_HEADER) or request.data.get("cart_token")
+
+
+def merge_guest_cart(token, user):
+    """
+    Move a guest cart into ``user``'s cart, adding quantities for products
+    already in it. Runs as a single store mutation, so the database sees
+    one bulk upsert rather than a save per line. The guest cart is locked
+    throughout and only deleted once the merge has committed, so a failed
+    merge leaves it for the next login. Returns the number of lines merged.
+    """
+    store = GuestCartStore()
+    with store.lock(token):
+        try:
+            guest = store.get(token)
+        except GuestCartNotFound:
+            return 0
+
+        def change(items):
+            for product_id, line in guest["items"].items():
+                if product_id in items:
+                    items[product_id]["quantity"] += line["quantity"]
+                else:
+                    items[product_id] = dict(line, id=None)
+
+        with transaction.atomic():
+            if guest["items"]:
+                get_cart_store().mutate(user, change)
+            transaction.on_commit(lambda: store.delete(token))
+    return len(guest["items"])
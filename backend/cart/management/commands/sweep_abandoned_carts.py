@@ -0,0 +1,39 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from cart.sweeper import sweep_abandoned_carts
+
+
+class Command(BaseCommand):
+    help = "Delete customer carts idle for longer than ABANDONED_CART_TTL, in small chunks"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--ttl-days', type=float, help="Override settings.ABANDONED_CART_TTL")
+        parser.add_argument('--chunk-size', type=int, default=500)
+        parser.add_argument('--pause', type=float, default=0, help="Seconds to sleep between chunks")
+        parser.add_argument('--dry-run', action='store_true', help="Only count matching carts")
+
+    def handle(self, *args, **options):
+        ttl = options['ttl_days'] * 86400 if options['ttl_days'] is not None else None
+
+        started = time.monotonic()
+        carts = items = chunks = 0
+        for chunk_carts, chunk_items in sweep_abandoned_carts(
+            ttl=ttl, chunk_size=options['chunk_size'], dry_run=options['dry_run']
+        ):
+            carts += chunk_carts
+            items += chunk_items
+            chunks += 1
+            if options['verbosity'] > 1:
+                self.stdout.write(f"Chunk {chunks}: {chunk_carts} carts, {chunk_items} items")
+            if options['pause']:
+                time.sleep(options['pause'])
+
+        elapsed = time.monotonic() - started
+        rate = carts / elapsed if elapsed else 0
+        verb = "Would delete" if options['dry_run'] else "Deleted"
+        self.stdout.write(self.style.SUCCESS(
+            f"{verb} {carts} carts and {items} items in {chunks} chunks, "
+            f"{elapsed:.2f}s ({rate:.0f} carts/s)"
+        ))
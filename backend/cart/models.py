@@ -1,4 +1,6 @@
-from django.db import models
+from django.db import IntegrityError, connection, models, transaction
+from django.db.models import F
+from django.utils import timezone
 from accounts.models import CustomerProfile
 from products.models import Product
 
@@ -7,8 +9,51 @@ class Cart(models.Model):
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
+    class Meta:
+        indexes = [
+            # Abandoned-cart sweep: oldest idle carts first
+            models.Index(fields=['updated_at', 'id'], name='cart_updated_id_idx'),
+        ]
+
+    def touch(self):
+        # Item changes don't save the cart row; bump its version stamp
+        self.updated_at = timezone.now()
+        Cart.objects.filter(pk=self.pk).update(updated_at=self.updated_at)
+
+class CartItemManager(models.Manager):
+    def add_quantity(self, cart_id, product_id, quantity, price):
+        """
+        Add ``quantity`` to the (cart, product) line, creating it if needed.
+        The increment is a single F() UPDATE, so concurrent adds can't lose
+        one; if two adds race to create the line, the unique constraint
+        lets one insert win and the other retries as an increment.
+        """
+        lines = self.filter(cart_id=cart_id, product_id=product_id)
+        if lines.update(quantity=F('quantity') + quantity):
+            return
+        try:
+            with transaction.atomic():
+                self.create(cart_id=cart_id, product_id=product_id, quantity=quantity, price_at_time=price)
+        except IntegrityError:
+            lines.update(quantity=F('quantity') + quantity)
+
+    def upsert(self, items):
+        """bulk_create that overwrites quantity on (cart, product) conflicts."""
+        kwargs = {}
+        if connection.features.supports_update_conflicts_with_target:
+            kwargs['unique_fields'] = ['cart', 'product']
+        return self.bulk_create(items, update_conflicts=True, update_fields=['quantity'], **kwargs)
+
+
 class CartItem(models.Model):
     cart = models.ForeignKey(Cart, on_delete=models.CASCADE, related_name='items')
     product = models.ForeignKey(Product, on_delete=models.PROTECT)
     quantity = models.IntegerField()
     price_at_time = models.DecimalField(max_digits=10, decimal_places=2)
+
+    objects = CartItemManager()
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['cart', 'product'], name='unique_cart_product'),
+        ]
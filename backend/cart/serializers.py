@@ -11,4 +11,22 @@ class CartSerializer(serializers.ModelSerializer):
 
     class Meta:
         model = Cart
-        fields = ["id", "items"]
\ No newline at end of file
+        fields = ["id", "items"]
+
+class AddToCartSerializer(serializers.Serializer):
+    """Body of an add-to-cart request; the quantity is sent as stock_quantity."""
+    product_id = serializers.IntegerField()
+    stock_quantity = serializers.IntegerField(min_value=1, default=1)
+
+class CartOperationSerializer(serializers.Serializer):
+    """One entry of a cart patch: add to, set or remove a product line."""
+    op = serializers.ChoiceField(choices=["add", "set", "remove"])
+    product_id = serializers.IntegerField()
+    quantity = serializers.IntegerField(min_value=0, required=False)
+
+    def validate(self, data):
+        if data["op"] != "remove" and "quantity" not in data:
+            raise serializers.ValidationError({"quantity": "This field is required."})
+        if data["op"] == "add" and data["quantity"] < 1:
+            raise serializers.ValidationError({"quantity": "Must be at least 1."})
+        return data
@@ -0,0 +1,327 @@
+"""
+Pluggable cart storage.
+
+A cart is handled as a plain ``state`` dict keyed by product id::
+
+    {
+        "cart_id": 3,                  # Cart row, None until first flush
+        "version": 1712345678901,      # changes on every mutation
+        "updated_at": "2026-...",      # ISO timestamp of the last mutation
+        "items": {"12": {"id": 40, "quantity": 2, "price_at_time": "9.99"}},
+    }
+
+``DatabaseCartStore`` reads and writes Cart / CartItem directly.
+``CacheCartStore`` keeps the working cart in Django's cache and writes it
+back to the database in the background (write-behind), so reads and
+mutations don't hit the database. Pick one with ``settings.CART_STORE``.
+
+``GuestCartStore`` holds anonymous carts, addressed by an opaque token,
+in the cache only; they expire after ``settings.GUEST_CART_TTL``.
+"""
+import logging
+import secrets
+import time
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from decimal import Decimal
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import close_old_connections, transaction
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+from django.utils.module_loading import import_string
+from rest_framework.exceptions import APIException
+
+from accounts.models import CustomerProfile
+from .models import Cart, CartItem
+
+logger = logging.getLogger(__name__)
+
+
+def empty_state():
+    return {"cart_id": None, "version": 0, "updated_at": None, "items": {}}
+
+
+def touch_state(state):
+    now = timezone.now()
+    state["version"] = int(now.timestamp() * 1_000_000)
+    state["updated_at"] = now.isoformat()
+    return state
+
+
+def load_from_db(user_id):
+    cart = Cart.objects.filter(customer__user_id=user_id).values('id', 'updated_at').first()
+    if cart is None:
+        return empty_state()
+
+    items = CartItem.objects.filter(cart_id=cart['id']).values(
+        'id', 'product_id', 'quantity', 'price_at_time'
+    )
+    return {
+        "cart_id": cart['id'],
+        "version": int(cart['updated_at'].timestamp() * 1_000_000),
+        "updated_at": cart['updated_at'].isoformat(),
+        "items": {
+            str(item['product_id']): {
+                "id": item['id'],
+                "quantity": item['quantity'],
+                "price_at_time": str(item['price_at_time']),
+            }
+            for item in items
+        },
+    }
+
+
+def write_items(cart, items):
+    """Diff ``items`` against the (locked) cart's rows and apply it in bulk."""
+    existing = {item.product_id: item for item in cart.items.all()}
+    wanted = {int(pid): line for pid, line in items.items()}
+
+    stale = [item.pk for pid, item in existing.items() if pid not in wanted]
+    if stale:
+        CartItem.objects.filter(pk__in=stale).delete()
+
+    changed = [
+        CartItem(
+            cart=cart,
+            product_id=pid,
+            quantity=line["quantity"],
+            price_at_time=Decimal(line["price_at_time"]),
+        )
+        for pid, line in wanted.items()
+        if pid not in existing or existing[pid].quantity != line["quantity"]
+    ]
+    if changed:
+        CartItem.objects.upsert(changed)
+    cart.touch()
+
+
+def lock_cart(customer):
+    cart, _ = Cart.objects.get_or_create(customer=customer)
+    return Cart.objects.select_for_update().get(pk=cart.pk)
+
+
+class CartBusy(APIException):
+    status_code = 409
+    default_detail = "Cart is being updated, please retry"
+    default_code = "cart_busy"
+
+
+@contextmanager
+def cache_lock(key, timeout):
+    """
+    Per-cart mutex in the cache so concurrent clicks don't lose updates.
+    Raises CartBusy if the lock isn't free within ``timeout`` seconds; the
+    lock expires on its own after ``timeout`` if its holder dies.
+    """
+    lock = f"{key}:lock"
+    token = secrets.token_hex(8)
+    deadline = time.monotonic() + timeout
+    while not cache.add(lock, token, timeout):
+        if time.monotonic() > deadline:
+            raise CartBusy()
+        time.sleep(0.01)
+    try:
+        yield
+    finally:
+        # Only release our own lock: if it expired meanwhile, it may be
+        # someone else's now
+        if cache.get(lock) == token:
+            cache.delete(lock)
+
+
+@transaction.atomic
+def write_to_db(user_id, items):
+    """Make the user's Cart / CartItem rows match ``items``; returns the cart id."""
+    cart = lock_cart(CustomerProfile.objects.get(user_id=user_id))
+    write_items(cart, items)
+    return cart.pk
+
+
+class BaseCartStore:
+    """Carts are addressed by the owning ``User``."""
+
+    def get(self, user):
+        raise NotImplementedError
+
+    def mutate(self, user, change):
+        """
+        Apply ``change(items)`` to the cart's items dict under a per-cart
+        lock, persist it and return the new state. If ``change`` raises,
+        nothing is written.
+        """
+        raise NotImplementedError
+
+    def flush(self, user_id):
+        """Make sure the database copy is current."""
+
+    def invalidate(self, user_id):
+        """Forget any copy that may be older than the database."""
+
+    def stamp(self, user):
+        """``(version, updated_at)`` of the cart or None; used for ETags."""
+        state = self.get(user)
+        if state["updated_at"] is None:
+            return None
+        return state["version"], parse_datetime(state["updated_at"])
+
+    def add(self, user, product, quantity):
+        def change(items):
+            line = items.get(str(product["id"]))
+            if line:
+                line["quantity"] += quantity
+            else:
+                items[str(product["id"])] = {
+                    "id": None,
+                    "quantity": quantity,
+                    "price_at_time": str(product["price"]),
+                }
+        self.mutate(user, change)
+
+    def set_quantity(self, user, product_id, quantity):
+        def change(items):
+            if quantity <= 0:
+                items.pop(str(product_id), None)
+            elif str(product_id) in items:
+                items[str(product_id)]["quantity"] = quantity
+        self.mutate(user, change)
+
+    def remove(self, user, product_id):
+        self.set_quantity(user, product_id, 0)
+
+
+class DatabaseCartStore(BaseCartStore):
+    def get(self, user):
+        return load_from_db(user.id)
+
+    @transaction.atomic
+    def mutate(self, user, change):
+        cart = lock_cart(user.customerprofile)
+        state = load_from_db(user.id)
+        change(state["items"])
+        write_items(cart, state["items"])
+        return load_from_db(user.id)
+
+    def cart_id(self, user):
+        cart_id = Cart.objects.filter(customer__user_id=user.id).values_list('id', flat=True).first()
+        if cart_id is None:
+            cart_id = Cart.objects.get_or_create(customer=user.customerprofile)[0].pk
+        return cart_id
+
+    def add(self, user, product, quantity):
+        cart_id = self.cart_id(user)
+        CartItem.objects.add_quantity(cart_id, product["id"], quantity, product["price"])
+        Cart.objects.filter(pk=cart_id).update(updated_at=timezone.now())
+
+    def set_quantity(self, user, product_id, quantity):
+        items = CartItem.objects.filter(cart__customer=user.customerprofile, product_id=product_id)
+        if quantity <= 0:
+            items.delete()
+        else:
+            items.update(quantity=quantity)
+        Cart.objects.filter(customer=user.customerprofile).update(updated_at=timezone.now())
+
+
+class CacheCartStore(BaseCartStore):
+    timeout = 60 * 60 * 24 * 7
+    lock_timeout = 5
+
+    _executor = None
+
+    def key(self, user_id):
+        return f"cart:{user_id}"
+
+    def get(self, user):
+        return self.load(user.id)
+
+    def load(self, user_id):
+        state = cache.get(self.key(user_id))
+        if state is None:
+            state = load_from_db(user_id)
+            cache.add(self.key(user_id), state, self.timeout)
+        return state
+
+    def mutate(self, user, change):
+        with cache_lock(self.key(user.id), self.lock_timeout):
+            state = self.load(user.id)
+            change(state["items"])
+            touch_state(state)
+            cache.set(self.key(user.id), state, self.timeout)
+
+        user_id = user.id
+        transaction.on_commit(lambda: self.executor().submit(self.write_back, user_id))
+        return state
+
+    def flush(self, user_id):
+        state = cache.get(self.key(user_id))
+        if state is not None:
+            write_to_db(user_id, state["items"])
+
+    def write_back(self, user_id):
+        try:
+            self.flush(user_id)
+        except Exception:
+            logger.exception("Failed to write back cart of user %s", user_id)
+        finally:
+            close_old_connections()
+
+    def invalidate(self, user_id):
+        cache.delete(self.key(user_id))
+
+    @classmethod
+    def executor(cls):
+        # One writer thread keeps write-backs in mutation order
+        if cls._executor is None:
+            cls._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix='cart-writeback')
+        return cls._executor
+
+
+class GuestCartNotFound(Exception):
+    pass
+
+
+class GuestCartStore(BaseCartStore):
+    """
+    Anonymous carts; addressed by token instead of ``User``. Every
+    mutation restarts the expiry clock. Nothing is written to the
+    database until the cart is merged into a customer's cart on login.
+    """
+    lock_timeout = 5
+    token_bytes = 24
+
+    @property
+    def timeout(self):
+        return settings.GUEST_CART_TTL
+
+    def key(self, token):
+        return f"guest-cart:{token}"
+
+    def create(self):
+        token = secrets.token_urlsafe(self.token_bytes)
+        cache.set(self.key(token), empty_state(), self.timeout)
+        return token
+
+    def get(self, token):
+        state = cache.get(self.key(token))
+        if state is None:
+            raise GuestCartNotFound(token)
+        return state
+
+    def mutate(self, token, change):
+        with self.lock(token):
+            state = self.get(token)
+            change(state["items"])
+            touch_state(state)
+            cache.set(self.key(token), state, self.timeout)
+        return state
+
+    def lock(self, token):
+        return cache_lock(self.key(token), self.lock_timeout)
+
+    def delete(self, token):
+        cache.delete(self.key(token))
+
+
+def get_cart_store():
+    return import_string(settings.CART_STORE)()
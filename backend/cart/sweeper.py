@@ -0,0 +1,53 @@
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import connection, transaction
+from django.db.models import Q
+from django.utils import timezone
+
+from .models import Cart
+from .storage import get_cart_store
+
+
+def sweep_abandoned_carts(ttl=None, chunk_size=500, dry_run=False):
+    """
+    Delete carts (and their items) idle for longer than ``ttl`` seconds.
+
+    Walks the (updated_at, id) index oldest first and deletes one chunk
+    per short transaction, so no lock is held for long. Carts locked by a
+    concurrent write are skipped and left for the next run. Yields
+    ``(carts, items)`` deleted per chunk.
+    """
+    if ttl is None:
+        ttl = settings.ABANDONED_CART_TTL
+    cutoff = timezone.now() - timedelta(seconds=ttl)
+    idle = Cart.objects.filter(updated_at__lt=cutoff)
+    store = get_cart_store()
+
+    after = Q()
+    while True:
+        chunk = list(
+            idle.filter(after).order_by('updated_at', 'id')
+            .values_list('updated_at', 'id')[:chunk_size]
+        )
+        if not chunk:
+            return
+        last_updated, last_id = chunk[-1]
+        after = Q(updated_at__gt=last_updated) | Q(updated_at=last_updated, id__gt=last_id)
+
+        ids = [cart_id for _, cart_id in chunk]
+        if dry_run:
+            yield len(ids), 0
+            continue
+
+        with transaction.atomic():
+            # Re-check idleness under the lock: the cart may just have been used
+            locked = idle.filter(pk__in=ids)
+            if connection.features.has_select_for_update_skip_locked:
+                locked = locked.select_for_update(skip_locked=True, of=('self',))
+            rows = list(locked.values_list('id', 'customer__user_id'))
+            _, deleted = Cart.objects.filter(pk__in=[cart_id for cart_id, _ in rows]).delete()
+
+        for _, user_id in rows:
+            store.invalidate(user_id)
+        yield deleted.get('cart.Cart', 0), deleted.get('cart.CartItem', 0)
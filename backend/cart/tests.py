@@ -1,3 +1,447 @@
-from django.test import TestCase
+import threading
+from datetime import timedelta
+from io import StringIO
+from unittest import mock
 
-# Create your tests here.
+from django.core.cache import cache
+from django.core.management import call_command
+from django.db import connection
+from django.test import TestCase, TransactionTestCase, override_settings
+from django.utils import timezone
+from rest_framework.test import APIClient
+
+from accounts.models import CustomerProfile, SellerProfile, User
+from products import holds
+from products.models import Category, Product
+from .models import Cart, CartItem
+from .guest import merge_guest_cart
+from .storage import CacheCartStore, CartBusy, DatabaseCartStore, GuestCartStore, cache_lock
+from .sweeper import sweep_abandoned_carts
+from .views import cart_data
+
+
+def make_product(stock=100):
+    user = User.objects.create_user('seller@example.com', 'pass', role='SELLER')
+    seller = SellerProfile.objects.create(user=user, store_name='Store', is_verified=True)
+    category = Category.objects.create(name='Electronics')
+    return Product.objects.create(
+        seller=seller,
+        category=category,
+        title='Phone',
+        description='',
+        price=100,
+        stock_quantity=stock,
+    )
+
+
+def make_customer(email='customer@example.com'):
+    user = User.objects.create_user(email, 'pass', role='CUSTOMER')
+    CustomerProfile.objects.create(user=user)
+    return user
+
+
+class CartUpsertTests(TestCase):
+    def setUp(self):
+        self.product = make_product()
+        self.user = make_customer()
+        self.snapshot = {"id": self.product.id, "price": self.product.price}
+        self.store = DatabaseCartStore()
+
+    def test_repeated_adds_increment_one_row(self):
+        for _ in range(3):
+            self.store.add(self.user, self.snapshot, 2)
+
+        self.assertEqual(CartItem.objects.count(), 1)
+        self.assertEqual(CartItem.objects.get().quantity, 6)
+
+    def test_add_to_existing_cart_query_count(self):
+        self.store.add(self.user, self.snapshot, 1)
+
+        # cart id lookup + increment + cart touch; the old get_or_create
+        # path took 5 (profile, product, cart, item, save)
+        with self.assertNumQueries(3):
+            self.store.add(self.user, self.snapshot, 1)
+
+    @override_settings(CART_STORE='cart.storage.DatabaseCartStore')
+    def test_add_view_uses_upsert(self):
+        client = APIClient()
+        client.force_authenticate(self.user)
+        for _ in range(2):
+            response = client.post('/api/cart/add/', {'product_id': self.product.id, 'stock_quantity': 1})
+            self.assertEqual(response.status_code, 200)
+
+        self.assertEqual(CartItem.objects.get().quantity, 2)
+
+
+class ConcurrentCartAddTests(TransactionTestCase):
+    threads = 8
+
+    def setUp(self):
+        cache.clear()
+        self.product = make_product()
+        self.user = make_customer()
+        self.snapshot = {"id": self.product.id, "price": self.product.price}
+
+    def add_in_parallel(self, store):
+        barrier = threading.Barrier(self.threads)
+        errors = []
+
+        def add():
+            try:
+                barrier.wait()
+                store.add(self.user, self.snapshot, 1)
+            except Exception as e:  # surfaced below
+                errors.append(e)
+            finally:
+                connection.close()
+
+        workers = [threading.Thread(target=add) for _ in range(self.threads)]
+        for worker in workers:
+            worker.start()
+        for worker in workers:
+            worker.join()
+        self.assertEqual(errors, [])
+
+    def assertOneLine(self, quantity):
+        self.assertEqual(CartItem.objects.filter(product=self.product).count(), 1)
+        self.assertEqual(CartItem.objects.get(product=self.product).quantity, quantity)
+
+    def test_parallel_adds_do_not_duplicate_or_lose_updates(self):
+        Cart.objects.create(customer=self.user.customerprofile)
+        self.add_in_parallel(DatabaseCartStore())
+        self.assertOneLine(self.threads)
+
+    def test_parallel_adds_through_the_cache_store(self):
+        store = CacheCartStore()
+        self.add_in_parallel(store)
+        self.assertEqual(store.get(self.user)["items"][str(self.product.id)]["quantity"], self.threads)
+
+        # The single writer thread runs write-backs in order; wait for the last
+        CacheCartStore.executor().submit(lambda: None).result()
+        self.assertOneLine(self.threads)
+
+
+@override_settings(CART_STORE='cart.storage.DatabaseCartStore')
+class CartConditionalGetTests(TestCase):
+    def test_cart_revalidates_after_a_change(self):
+        product = make_product()
+        user = make_customer()
+        client = APIClient()
+        client.force_authenticate(user)
+        client.post('/api/cart/add/', {'product_id': product.id, 'stock_quantity': 1})
+
+        etag = client.get('/api/cart/')['ETag']
+        self.assertEqual(client.get('/api/cart/', HTTP_IF_NONE_MATCH=etag).status_code, 304)
+
+        client.put(f'/api/cart/items/{product.id}/', {'quantity': 3})
+        response = client.get('/api/cart/', HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['items'][0]['quantity'], 3)
+
+
+class CacheLockTests(TestCase):
+    def setUp(self):
+        cache.clear()
+
+    def test_a_held_lock_times_out_instead_of_being_skipped(self):
+        with cache_lock('cart:1', timeout=5):
+            with self.assertRaises(CartBusy):
+                with cache_lock('cart:1', timeout=0.05):
+                    pass
+            self.assertIsNotNone(cache.get('cart:1:lock'))
+        self.assertIsNone(cache.get('cart:1:lock'))
+
+    def test_an_expired_lock_taken_over_by_another_holder_is_left_alone(self):
+        with cache_lock('cart:1', timeout=5):
+            # Our lock expired and someone else took it
+            cache.set('cart:1:lock', 'other-holder')
+        self.assertEqual(cache.get('cart:1:lock'), 'other-holder')
+
+
+class AddToCartTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.product = make_product(stock=3)
+        self.client = APIClient()
+        self.client.force_authenticate(make_customer())
+
+    def add(self, quantity=1):
+        return self.client.post('/api/cart/add/', {'product_id': self.product.id, 'stock_quantity': quantity})
+
+    def test_inactive_products_are_rejected(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            self.product.is_active = False
+            self.product.save()
+        self.assertEqual(self.add().status_code, 400)
+        self.assertFalse(CartItem.objects.exists())
+
+    def test_more_than_the_stock_is_rejected(self):
+        self.assertEqual(self.add(4).status_code, 400)
+        self.assertEqual(self.add(3).status_code, 200)
+        self.assertEqual(CartItem.objects.get().quantity, 3)
+
+    def test_quantity_must_be_a_positive_integer(self):
+        for quantity in (0, -2, 'abc'):
+            self.assertEqual(self.add(quantity).status_code, 400)
+        self.assertFalse(CartItem.objects.exists())
+
+    def test_units_held_by_another_customer_are_not_available(self):
+        other = make_customer('other@example.com')
+        self.add()  # caches the snapshot
+        with self.captureOnCommitCallbacks(execute=True):
+            holds.reserve(other.customerprofile, {self.product.id: 2})
+
+        self.assertEqual(self.add(2).status_code, 400)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            holds.release(other.customerprofile)
+        self.assertEqual(self.add(2).status_code, 200)
+
+    def test_own_held_units_can_still_be_added(self):
+        user = make_customer('holder@example.com')
+        with self.captureOnCommitCallbacks(execute=True):
+            holds.reserve(user.customerprofile, {self.product.id: 3})
+        self.client.force_authenticate(user)
+        self.assertEqual(self.add(3).status_code, 200)
+
+
+class CartPatchTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.phone = make_product(stock=5)
+        self.case = Product.objects.create(
+            seller=self.phone.seller, category=self.phone.category,
+            title='Case', description='', price=10, stock_quantity=5,
+        )
+        self.cable = Product.objects.create(
+            seller=self.phone.seller, category=self.phone.category,
+            title='Cable', description='', price=5, stock_quantity=5,
+        )
+        self.user = make_customer()
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+        DatabaseCartStore().add(self.user, {'id': self.phone.id, 'price': 100}, 1)
+        DatabaseCartStore().add(self.user, {'id': self.case.id, 'price': 10}, 1)
+
+    def patch(self, *operations):
+        return self.client.post('/api/cart/patch/', {'operations': list(operations)}, format='json')
+
+    def quantities(self):
+        return dict(CartItem.objects.values_list('product_id', 'quantity'))
+
+    def test_mixed_patch_is_applied_at_once(self):
+        response = self.patch(
+            {'op': 'add', 'product_id': self.phone.id, 'quantity': 2},
+            {'op': 'remove', 'product_id': self.case.id},
+            {'op': 'set', 'product_id': self.cable.id, 'quantity': 4},
+        )
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(self.quantities(), {self.phone.id: 3, self.cable.id: 4})
+        self.assertEqual(response.data['item_count'], 7)
+        self.assertEqual(response.data['subtotal'], '320.00')
+
+    def test_an_invalid_line_rejects_the_whole_patch(self):
+        response = self.patch(
+            {'op': 'remove', 'product_id': self.case.id},
+            {'op': 'set', 'product_id': self.cable.id},
+        )
+        self.assertEqual(response.status_code, 400)
+
+        response = self.patch(
+            {'op': 'remove', 'product_id': self.case.id},
+            {'op': 'add', 'product_id': 999999, 'quantity': 1},
+        )
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response.data['details'][0]['index'], 1)
+
+        response = self.patch(
+            {'op': 'remove', 'product_id': self.case.id},
+            {'op': 'set', 'product_id': self.phone.id, 'quantity': 6},
+        )
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response.data['details'][0]['available'], 5)
+
+        self.assertEqual(self.quantities(), {self.phone.id: 1, self.case.id: 1})
+
+    def test_units_held_by_another_customer_are_not_available(self):
+        other = make_customer('other@example.com')
+        holds.reserve(other.customerprofile, {self.phone.id: 4})
+
+        response = self.patch({'op': 'set', 'product_id': self.phone.id, 'quantity': 2})
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response.data['details'][0]['available'], 1)
+        self.assertEqual(self.quantities(), {self.phone.id: 1, self.case.id: 1})
+
+
+class CartDataTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.phone = make_product(stock=5)
+        self.case = Product.objects.create(
+            seller=self.phone.seller, category=self.phone.category,
+            title='Case', description='', price=10, stock_quantity=1,
+        )
+        self.cable = Product.objects.create(
+            seller=self.phone.seller, category=self.phone.category,
+            title='Cable', description='', price=5, stock_quantity=9, is_active=False,
+        )
+
+    def state(self, **lines):
+        return {
+            "cart_id": 1,
+            "version": 1,
+            "updated_at": None,
+            "items": {
+                str(getattr(self, name).id): {"id": None, "quantity": quantity, "price_at_time": price}
+                for name, (quantity, price) in lines.items()
+            },
+        }
+
+    def lines(self, data):
+        return {item["product"]: item for item in data["items"]}
+
+    def test_totals_use_todays_price_and_skip_unavailable_lines(self):
+        data = cart_data(self.state(phone=(2, '100.00'), case=(1, '12.00'), cable=(3, '5.00')))
+        lines = self.lines(data)
+
+        self.assertEqual(lines[self.case.id]["unit_price"], "10.00")
+        self.assertEqual(lines[self.case.id]["line_total"], "10.00")
+        self.assertEqual(data["subtotal"], "210.00")
+        self.assertEqual(lines[self.case.id]["product_summary"]["price"], "10.00")
+        self.assertEqual(data["item_count"], 6)
+
+    def test_flags(self):
+        data = cart_data(self.state(phone=(6, '100.00'), case=(1, '12.00'), cable=(1, '5.00')))
+        lines = self.lines(data)
+
+        self.assertTrue(lines[self.phone.id]["exceeds_stock"])
+        self.assertFalse(lines[self.phone.id]["price_changed"])
+        self.assertTrue(lines[self.case.id]["price_changed"])
+        self.assertFalse(lines[self.case.id]["exceeds_stock"])
+        self.assertFalse(lines[self.cable.id]["available"])
+        self.assertTrue(data["has_issues"])
+
+        clean = cart_data(self.state(phone=(1, '100.00')))
+        self.assertFalse(clean["has_issues"])
+
+    def test_held_units_count_against_stock_except_for_the_holder(self):
+        holder = make_customer()
+        with self.captureOnCommitCallbacks(execute=True):
+            holds.reserve(holder.customerprofile, {self.phone.id: 4})
+        state = self.state(phone=(2, '100.00'))
+
+        self.assertTrue(self.lines(cart_data(state))[self.phone.id]["exceeds_stock"])
+        self.assertFalse(self.lines(cart_data(state, holder))[self.phone.id]["exceeds_stock"])
+
+    @override_settings(CART_STORE='cart.storage.CacheCartStore')
+    def test_cached_cart_read_does_not_touch_the_database(self):
+        user = make_customer()
+        client = APIClient()
+        client.force_authenticate(user)
+        with self.captureOnCommitCallbacks():
+            CacheCartStore().add(user, {"id": self.phone.id, "price": self.phone.price}, 1)
+        client.get('/api/cart/')
+
+        with self.assertNumQueries(0):
+            response = client.get('/api/cart/')
+        self.assertEqual(response.data["subtotal"], "100.00")
+
+
+class GuestCartTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.phone = make_product(stock=5)
+        self.case = Product.objects.create(
+            seller=self.phone.seller, category=self.phone.category,
+            title='Case', description='', price=10, stock_quantity=5,
+        )
+        self.client = APIClient()
+        self.token = self.client.post('/api/cart/guest/').data['cart_token']
+        self.client.credentials(HTTP_X_CART_TOKEN=self.token)
+
+    def add(self, product, quantity):
+        return self.client.post('/api/cart/guest/add/', {'product_id': product.id, 'stock_quantity': quantity})
+
+    def test_guest_cart_lives_in_the_cache(self):
+        self.add(self.phone, 2)
+        self.add(self.phone, 1)
+        self.assertFalse(CartItem.objects.exists())
+
+        response = self.client.get('/api/cart/guest/')
+        self.assertEqual(response.data['item_count'], 3)
+        self.assertEqual(response.data['subtotal'], '300.00')
+
+    def test_unknown_token_is_not_found(self):
+        self.client.credentials(HTTP_X_CART_TOKEN='expired')
+        self.assertEqual(self.client.get('/api/cart/guest/').status_code, 404)
+        self.assertEqual(self.add(self.phone, 1).status_code, 404)
+
+    def test_invalid_quantity_is_rejected(self):
+        self.assertEqual(self.add(self.phone, 0).status_code, 400)
+        self.assertEqual(self.add(self.phone, 'abc').status_code, 400)
+        self.assertEqual(self.client.get('/api/cart/guest/').data['item_count'], 0)
+
+    def test_login_merges_into_the_customer_cart(self):
+        user = make_customer()
+        DatabaseCartStore().add(user, {'id': self.phone.id, 'price': 100}, 1)
+        self.add(self.phone, 2)
+        self.add(self.case, 1)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.client.post('/api/accounts/login/', {
+                'email': 'customer@example.com', 'password': 'pass', 'cart_token': self.token,
+            })
+        self.assertEqual(response.data['merged_cart_items'], 2)
+        self.assertEqual(
+            dict(CartItem.objects.values_list('product_id', 'quantity')),
+            {self.phone.id: 3, self.case.id: 1},
+        )
+        self.assertEqual(self.client.get('/api/cart/guest/').status_code, 404)
+
+    def test_failed_merge_keeps_the_guest_cart(self):
+        user = make_customer()
+        self.add(self.phone, 2)
+
+        with mock.patch.object(DatabaseCartStore, 'mutate', side_effect=RuntimeError):
+            with self.assertRaises(RuntimeError):
+                merge_guest_cart(self.token, user)
+        self.assertEqual(GuestCartStore().get(self.token)['items'][str(self.phone.id)]['quantity'], 2)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.assertEqual(merge_guest_cart(self.token, user), 1)
+        self.assertEqual(CartItem.objects.get().quantity, 2)
+        self.assertEqual(merge_guest_cart(self.token, user), 0)
+
+
+class AbandonedCartSweepTests(TestCase):
+    def setUp(self):
+        product = make_product()
+        self.stale = []
+        self.recent = []
+        for i in range(7):
+            user = make_customer(f'customer{i}@example.com')
+            DatabaseCartStore().add(user, {'id': product.id, 'price': product.price}, 1)
+            cart = Cart.objects.get(customer__user=user)
+            if i < 5:
+                Cart.objects.filter(pk=cart.pk).update(updated_at=timezone.now() - timedelta(days=40 + i))
+                self.stale.append(cart.pk)
+            else:
+                self.recent.append(cart.pk)
+
+    def test_stale_carts_are_swept_in_chunks(self):
+        chunks = list(sweep_abandoned_carts(chunk_size=2))
+
+        self.assertEqual(chunks, [(2, 2), (2, 2), (1, 1)])
+        self.assertEqual(sorted(Cart.objects.values_list('id', flat=True)), self.recent)
+        self.assertEqual(CartItem.objects.count(), 2)
+
+    def test_dry_run_only_counts(self):
+        self.assertEqual(sum(c for c, _ in sweep_abandoned_carts(chunk_size=2, dry_run=True)), 5)
+        self.assertEqual(Cart.objects.count(), 7)
+
+    def test_command_honours_the_ttl(self):
+        out = StringIO()
+        call_command('sweep_abandoned_carts', '--ttl-days', '42', '--chunk-size', '2', stdout=out)
+
+        self.assertIn('Deleted 3 carts and 3 items in 2 chunks', out.getvalue())
+        self.assertEqual(Cart.objects.count(), 4)
@@ -1,9 +1,16 @@
 from django.urls import path
-from .views import AddToCartView, CartView, UpdateCartItemView, DeleteCartItemView
+from .views import AddToCartView, CartPatchView, CartView, CartProductView, UpdateCartItemView, DeleteCartItemView
+from .views import GuestCartView, GuestAddToCartView, GuestCartPatchView, GuestCartProductView
 
 urlpatterns = [
     path("", CartView.as_view()),   
     path('add/', AddToCartView.as_view()),
+    path('patch/', CartPatchView.as_view()),
+    path("items/<int:product_id>/", CartProductView.as_view()),
     path("update/<int:item_id>/", UpdateCartItemView.as_view()),
     path("delete/<int:item_id>/", DeleteCartItemView.as_view()),
+    path("guest/", GuestCartView.as_view()),
+    path("guest/add/", GuestAddToCartView.as_view()),
+    path("guest/patch/", GuestCartPatchView.as_view()),
+    path("guest/items/<int:product_id>/", GuestCartProductView.as_view()),
 ]
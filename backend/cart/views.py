@@ -1,12 +1,84 @@
 from rest_framework.views import APIView
 from rest_framework.permissions import IsAuthenticated
 from rest_framework.response import Response
+from django.http import Http404
 from django.shortcuts import get_object_or_404
 import rest_framework.status as status
+from django.utils.decorators import method_decorator
+from django.views.decorators.http import condition
 
-from .models import Cart, CartItem
-from products.models import Product
-from .serializers import CartSerializer
+from decimal import Decimal
+
+from .models import CartItem
+from products import cache as catalog_cache
+from products import holds
+from products.cache import product_snapshot, product_summaries
+from .storage import GuestCartNotFound, GuestCartStore, get_cart_store
+from .guest import guest_token
+from .batch import MAX_OPERATIONS, CartPatchError, apply_cart_operations
+from .serializers import AddToCartSerializer, CartOperationSerializer
+
+
+def own_holds(owner):
+    """Units the owner holds themselves: still theirs to buy."""
+    customer = getattr(owner, "customerprofile", None)
+    return holds.held_by(customer) if customer else {}
+
+
+def money(amount):
+    # Same rendering as the serializers' DecimalFields: "10.00"
+    return str(Decimal(amount).quantize(Decimal('0.01')))
+
+
+def cart_data(state, owner=None):
+    """
+    Cart lines with current product data, line totals at today's price and
+    flags for price drift / stock shortfall, plus the cart subtotal. Product
+    data comes from the (cached) summaries; a line exceeds stock when it is
+    more than the units not held by other customers.
+    """
+    summaries = product_summaries(state["items"].keys())
+    # Only look up the owner's own holds when some product is under a hold
+    held = own_holds(owner) if any(
+        p["available"] < p["stock_quantity"] for p in summaries.values()
+    ) else {}
+
+    items = []
+    subtotal = Decimal('0')
+    for product_id, line in state["items"].items():
+        product = summaries.get(int(product_id))
+        price_at_time = Decimal(line["price_at_time"])
+        available = bool(product and product["is_active"])
+        unit_price = product["price"] if product else price_at_time
+        line_total = unit_price * line["quantity"]
+        if available:
+            subtotal += line_total
+
+        items.append({
+            "id": line["id"],
+            "cart": state["cart_id"],
+            "product": int(product_id),
+            "quantity": line["quantity"],
+            "price_at_time": line["price_at_time"],
+            "product_summary": {**product, "price": money(product["price"])} if product else None,
+            "unit_price": money(unit_price),
+            "line_total": money(line_total),
+            "available": available,
+            "price_changed": bool(product) and unit_price != price_at_time,
+            "exceeds_stock": bool(product) and (
+                line["quantity"] > product["available"] + held.get(int(product_id), 0)
+            ),
+        })
+
+    return {
+        "id": state["cart_id"],
+        "items": items,
+        "item_count": sum(line["quantity"] for line in state["items"].values()),
+        "subtotal": money(subtotal),
+        "has_issues": any(
+            not i["available"] or i["price_changed"] or i["exceeds_stock"] for i in items
+        ),
+    }
 
 
 # ➕ ADD TO CART
@@ -17,50 +89,121 @@ class AddToCartView(APIView):
         if request.user.role != "CUSTOMER":
             return Response({"error": "Only customers can add to cart"}, status=403)
 
-        product_id = request.data.get("product_id")
-        quantity = int(request.data.get("stock_quantity", 1))
+        return add_to_cart(get_cart_store(), request.user, request)
 
-        product = get_object_or_404(Product, id=product_id)
 
-        if product.stock_quantity < quantity:
-            return Response({"error": "Insufficient stock"}, status=400)
+def add_to_cart(store, owner, request):
+    serializer = AddToCartSerializer(data=request.data)
+    serializer.is_valid(raise_exception=True)
+    quantity = serializer.validated_data["stock_quantity"]
 
-        customer = request.user.customerprofile
-        cart, _ = Cart.objects.get_or_create(customer=customer)
+    # Served from the catalog cache, not the products table
+    product = product_snapshot(serializer.validated_data["product_id"])
+    if product is None:
+        raise Http404
+    if not product["is_active"]:
+        return Response({"error": "Product is not available"}, status=400)
 
-        cart_item, created = CartItem.objects.get_or_create(
-            cart=cart,
-            product=product,
-            defaults={"price_at_time": product.price,
-                        "quantity": quantity
-                      }
-        )
+    available = product["available"]
+    if available < quantity:
+        available += own_holds(owner).get(product["id"], 0)
+    if available < quantity:
+        return Response({"error": "Insufficient stock"}, status=400)
 
-        if not created:
-            cart_item.quantity += quantity
-        else:
-            cart_item.quantity = quantity
+    store.add(owner, product, quantity)
+
+    return Response({"message": "Added to cart"}, status=200)
+
+
+def patch_cart(store, owner, request):
+    operations = request.data.get("operations")
+    if not isinstance(operations, list) or not operations:
+        return Response({"error": "operations must be a non-empty list"}, status=400)
+    if len(operations) > MAX_OPERATIONS:
+        return Response({"error": f"At most {MAX_OPERATIONS} operations per request"}, status=400)
+
+    serializer = CartOperationSerializer(data=operations, many=True)
+    serializer.is_valid(raise_exception=True)
+
+    try:
+        state = apply_cart_operations(store, owner, serializer.validated_data)
+    except CartPatchError as e:
+        return Response({"error": "Cart not updated", "details": e.errors}, status=400)
+
+    return Response(cart_data(state, owner))
 
-        cart_item.save()
 
-        return Response({"message": "Added to cart"}, status=200)
+# 🧺 PATCH CART (many operations at once)
+class CartPatchView(APIView):
+    permission_classes = [IsAuthenticated]
+
+    def post(self, request):
+        if request.user.role != "CUSTOMER":
+            return Response({"error": "Only customers have carts"}, status=403)
+
+        return patch_cart(get_cart_store(), request.user, request)
+
+
+def cart_stamp(request):
+    # Shared by the ETag and Last-Modified checks
+    if not hasattr(request, '_cart_stamp'):
+        request._cart_stamp = get_cart_store().stamp(request.user)
+    return request._cart_stamp
+
+
+# The cart view embeds current prices and stock, so its validators cover
+# both the cart and the catalog version.
+
+def cart_etag(request, *args, **kwargs):
+    stamp = cart_stamp(request)
+    if not stamp:
+        return None
+    return f"cart-{request.user.id}-{stamp[0]}-{catalog_cache.get_version()}"
+
+
+def cart_last_modified(request, *args, **kwargs):
+    stamp = cart_stamp(request)
+    if not stamp:
+        return None
+    return max(stamp[1], catalog_cache.last_modified(request))
 
 
 # 🛒 VIEW CART
 class CartView(APIView):
     permission_classes = [IsAuthenticated]
 
+    @method_decorator(condition(etag_func=cart_etag, last_modified_func=cart_last_modified))
     def get(self, request):
         if request.user.role != "CUSTOMER":
             return Response(
                 {"error": "Only customers have carts"},
                 status=status.HTTP_403_FORBIDDEN
             )
-        cart, _ = Cart.objects.get_or_create(
-            customer=request.user.customerprofile
-        )
-        serializer = CartSerializer(cart)
-        return Response(serializer.data)
+        state = get_cart_store().get(request.user)
+        return Response(cart_data(state, request.user))
+
+
+# ✏️ UPDATE / REMOVE BY PRODUCT
+class CartProductView(APIView):
+    permission_classes = [IsAuthenticated]
+
+    def put(self, request, product_id):
+        if request.user.role != "CUSTOMER":
+            return Response({"error": "Not allowed"}, status=403)
+
+        quantity = int(request.data.get("quantity", 1))
+        get_cart_store().set_quantity(request.user, product_id, quantity)
+
+        if quantity <= 0:
+            return Response({"message": "Item removed"})
+        return Response({"message": "Quantity updated"})
+
+    def delete(self, request, product_id):
+        if request.user.role != "CUSTOMER":
+            return Response({"error": "Not allowed"}, status=403)
+
+        get_cart_store().remove(request.user, product_id)
+        return Response({"message": "Item deleted"})
 
 
 # ✏️ UPDATE CART ITEM
@@ -70,6 +213,10 @@ class UpdateCartItemView(APIView):
     def put(self, request, item_id):
         quantity = int(request.data.get("quantity", 1))
 
+        # Item ids are database ids: bring the stored cart up to date first
+        store = get_cart_store()
+        store.flush(request.user.id)
+
         cart_item = get_object_or_404(
             CartItem,
             id=item_id,
@@ -78,10 +225,14 @@ class UpdateCartItemView(APIView):
 
         if quantity <= 0:
             cart_item.delete()
+            cart_item.cart.touch()
+            store.invalidate(request.user.id)
             return Response({"message": "Item removed"})
 
         cart_item.quantity = quantity
         cart_item.save()
+        cart_item.cart.touch()
+        store.invalidate(request.user.id)
 
         return Response({"message": "Quantity updated"})
 
@@ -91,11 +242,64 @@ class DeleteCartItemView(APIView):
     permission_classes = [IsAuthenticated]
 
     def delete(self, request, item_id):
+        store = get_cart_store()
+        store.flush(request.user.id)
+
         cart_item = get_object_or_404(
             CartItem,
             id=item_id,
             cart__customer=request.user.customerprofile
         )
         cart_item.delete()
+        cart_item.cart.touch()
+        store.invalidate(request.user.id)
+
+        return Response({"message": "Item deleted"})
+
+
+# 👤 GUEST CART (anonymous, identified by the X-Cart-Token header)
+class GuestCartMixin:
+    def handle_exception(self, exc):
+        if isinstance(exc, GuestCartNotFound):
+            return Response({"error": "Cart not found or expired"}, status=404)
+        return super().handle_exception(exc)
+
+    def token(self, request):
+        token = guest_token(request)
+        if not token:
+            raise GuestCartNotFound(token)
+        return token
+
+
+class GuestCartView(GuestCartMixin, APIView):
+    def post(self, request):
+        store = GuestCartStore()
+        token = store.create()
+        return Response({"cart_token": token, **cart_data(store.get(token))}, status=201)
+
+    def get(self, request):
+        return Response(cart_data(GuestCartStore().get(self.token(request))))
+
+
+class GuestAddToCartView(GuestCartMixin, APIView):
+    def post(self, request):
+        return add_to_cart(GuestCartStore(), self.token(request), request)
+
+
+class GuestCartPatchView(GuestCartMixin, APIView):
+    def post(self, request):
+        return patch_cart(GuestCartStore(), self.token(request), request)
+
+
+class GuestCartProductView(GuestCartMixin, APIView):
+    def put(self, request, product_id):
+        quantity = int(request.data.get("quantity", 1))
+        GuestCartStore().set_quantity(self.token(request), product_id, quantity)
+
+        if quantity <= 0:
+            return Response({"message": "Item removed"})
+        return Response({"message": "Quantity updated"})
 
+    def delete(self, request, product_id):
+        GuestCartStore().remove(self.token(request), product_id)
         return Response({"message": "Item deleted"})
@@ -0,0 +1,96 @@
+from django.db import transaction
+from django.http import Http404
+
+from products import facets, holds
+from products.models import Product
+from .models import Order, OrderItem
+
+
+class CheckoutError(Exception):
+    pass
+
+
+def merge_lines(items):
+    """``[{product_id, quantity}]`` -> ``{product_id: total quantity}``."""
+    lines = {}
+    for item in items:
+        lines[item["product_id"]] = lines.get(item["product_id"], 0) + item["quantity"]
+    return lines
+
+
+@transaction.atomic
+def place_order(customer, address, items):
+    """
+    Create an order for validated ``items`` in a fixed number of queries.
+
+    Lines fully covered by the customer's holds (see products.holds) are
+    already set aside, so their products are read without a lock. Lines
+    that aren't go through the locking path: those products are locked
+    with one SELECT ... FOR UPDATE ordered by id, so concurrent checkouts
+    always take row locks in the same order and can't deadlock, and are
+    validated against the stock other customers' holds leave free. Stock
+    is then decremented for every line with a single conditional UPDATE
+    and items are bulk-inserted. Raises CheckoutError (nothing written)
+    if a line can't be met.
+    """
+    lines = merge_lines(items)
+    covered = holds.consume(customer, lines)
+    unheld = {
+        pk: quantity - covered.get(pk, 0)
+        for pk, quantity in lines.items()
+        if quantity > covered.get(pk, 0)
+    }
+
+    fields = ("id", "title", "seller_id", *facets.SNAPSHOT_FIELDS)
+    products = {}
+    if len(unheld) < len(lines):
+        products.update(
+            (row["id"], row)
+            for row in Product.objects.filter(pk__in=[pk for pk in lines if pk not in unheld]).values(*fields)
+        )
+    if unheld:
+        products.update(
+            (row["id"], row)
+            for row in Product.objects.select_for_update()
+            .filter(pk__in=list(unheld))
+            .order_by("id")
+            .annotate(held=holds.held_units())
+            .values(*fields, "held")
+        )
+    if len(products) != len(lines):
+        raise Http404
+
+    total = 0
+    for product_id, quantity in lines.items():
+        product = products[product_id]
+        if not product["is_active"]:
+            raise CheckoutError(f"{product['title']} is no longer available")
+        # The customer's own holds on these products were used up above,
+        # so whatever is still held belongs to someone else
+        if product_id in unheld and product["stock_quantity"] - product["held"] < quantity:
+            raise CheckoutError(f"Insufficient stock for {product['title']}")
+        total += product["price"] * quantity
+
+    order = Order.objects.create(
+        customer=customer,
+        total_amount=total,
+        shipping_address_id=address.id
+    )
+    OrderItem.objects.bulk_create([
+        OrderItem(
+            order=order,
+            product_id=product_id,
+            seller_id=products[product_id]["seller_id"],
+            quantity=quantity,
+            price=products[product_id]["price"],
+            ordered_at=order.created_at,
+        )
+        for product_id, quantity in lines.items()
+    ])
+
+    # Guarded decrement: a row only changes if it still has the stock
+    deltas = {pk: -quantity for pk, quantity in sorted(lines.items())}
+    if holds.change_stock(deltas) != len(deltas):
+        raise CheckoutError("Stock changed during checkout, please retry")
+    holds.stock_changed(deltas)
+    return order
@@ -0,0 +1,107 @@
+"""
+Streaming order export (NDJSON or CSV) shared by the admin endpoint and
+the ``export_orders`` command. Orders are read in keyset chunks of
+``chunk_size`` with their items prefetched per chunk, so memory stays flat
+however many orders match.
+"""
+import csv
+import json
+
+from django.core.serializers.json import DjangoJSONEncoder
+
+from backend.pagination import KeysetPagination
+from .models import Order
+
+FORMATS = ('ndjson', 'csv')
+CONTENT_TYPES = {
+    'ndjson': 'application/x-ndjson',
+    'csv': 'text/csv',
+}
+CSV_HEADER = [
+    'order_id', 'created_at', 'customer_id', 'order_status', 'total_amount',
+    'shipping_address_id', 'item_id', 'product_id', 'product_title',
+    'seller_id', 'quantity', 'price', 'item_status',
+]
+# Leading characters a spreadsheet would evaluate as a formula
+FORMULA_PREFIXES = ('=', '+', '-', '@', '\t', '\r')
+
+
+def iter_orders(orders, chunk_size=500):
+    """Yield ``orders`` oldest first, one chunk (two queries) at a time."""
+    keyset = KeysetPagination(ordering=('created_at', 'id'))
+    orders = orders.with_items().order_by(*keyset.ordering)
+
+    page = list(orders[:chunk_size])
+    while page:
+        yield from page
+        if len(page) < chunk_size:
+            return
+        page = list(orders.filter(keyset.after([page[-1].created_at, page[-1].id]))[:chunk_size])
+
+
+def order_row(order):
+    return {
+        'id': order.id,
+        'created_at': order.created_at,
+        'customer_id': order.customer_id,
+        'order_status': order.order_status,
+        'total_amount': order.total_amount,
+        'shipping_address_id': order.shipping_address_id,
+        'items': [
+            {
+                'id': item.id,
+                'product_id': item.product_id,
+                'product_title': item.product.title,
+                'seller_id': item.seller_id,
+                'quantity': item.quantity,
+                'price': item.price,
+                'status': item.status,
+            }
+            for item in order.orderitem_set.all()
+        ],
+    }
+
+
+def ndjson_lines(orders):
+    for order in orders:
+        yield json.dumps(order_row(order), cls=DjangoJSONEncoder) + '\n'
+
+
+class Echo:
+    """File-like object whose write() just returns the line, for csv.writer."""
+    def write(self, value):
+        return value
+
+
+def csv_safe(value):
+    """Quote user-supplied text (e.g. a product title) so it can't run as a formula."""
+    if isinstance(value, str) and value.startswith(FORMULA_PREFIXES):
+        return "'" + value
+    return value
+
+
+def csv_lines(orders):
+    """One row per order item; orders without items get one row with empty item columns."""
+    writer = csv.writer(Echo())
+    yield writer.writerow(CSV_HEADER)
+    for order in orders:
+        row = order_row(order)
+        head = [
+            row['id'], row['created_at'].isoformat(), row['customer_id'],
+            row['order_status'], row['total_amount'], row['shipping_address_id'],
+        ]
+        for item in row['items'] or [None]:
+            if item is None:
+                yield writer.writerow(head + [''] * 7)
+                continue
+            yield writer.writerow(head + [
+                item['id'], item['product_id'], csv_safe(item['product_title']), item['seller_id'],
+                item['quantity'], item['price'], item['status'],
+            ])
+
+
+def export_lines(fmt, orders=None, chunk_size=500):
+    if orders is None:
+        orders = Order.objects.all()
+    rows = iter_orders(orders, chunk_size)
+    return csv_lines(rows) if fmt == 'csv' else ndjson_lines(rows)
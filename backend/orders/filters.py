@@ -0,0 +1,43 @@
+from datetime import datetime, time
+
+from django.utils import timezone
+from django.utils.dateparse import parse_date, parse_datetime
+
+
+def parse_date_param(value, end_of_day=False):
+    """``YYYY-MM-DD`` or an ISO datetime; a bare ``to`` date includes the whole day."""
+    # Dates first: parse_datetime also accepts a bare date, as midnight
+    day = parse_date(value)
+    if day is not None:
+        parsed = datetime.combine(day, time.max if end_of_day else time.min)
+    else:
+        parsed = parse_datetime(value)
+        if parsed is None:
+            raise ValueError(value)
+    if timezone.is_naive(parsed):
+        parsed = timezone.make_aware(parsed)
+    return parsed
+
+
+def filter_status_and_dates(queryset, params, status_field, date_field):
+    """
+    Apply ``status`` (repeated or comma separated) and ``date_from`` /
+    ``date_to`` query params. Raises ValueError with a client message.
+    """
+    statuses = [s for value in params.getlist('status') for s in value.split(',') if s]
+    if statuses:
+        valid = {choice for choice, _ in queryset.model._meta.get_field(status_field).choices}
+        if not set(statuses) <= valid:
+            raise ValueError("Invalid status")
+        queryset = queryset.filter(**{f'{status_field}__in': statuses})
+
+    try:
+        if params.get('date_from'):
+            queryset = queryset.filter(**{f'{date_field}__gte': parse_date_param(params['date_from'])})
+        if params.get('date_to'):
+            queryset = queryset.filter(
+                **{f'{date_field}__lte': parse_date_param(params['date_to'], end_of_day=True)}
+            )
+    except ValueError:
+        raise ValueError("Invalid date")
+    return queryset
@@ -0,0 +1,85 @@
+import hashlib
+import json
+from datetime import timedelta
+from functools import wraps
+
+from django.conf import settings
+from django.db import IntegrityError, transaction
+from django.utils import timezone
+from rest_framework.response import Response
+
+from .models import IdempotencyKey
+
+HEADER = "Idempotency-Key"
+MAX_KEY_LENGTH = 64
+
+
+def fingerprint(request):
+    digest = hashlib.sha256()
+    digest.update(f"{request.method} {request.get_full_path()}\n".encode())
+    digest.update(json.dumps(request.data, sort_keys=True, default=str).encode())
+    return digest.hexdigest()
+
+
+def replay(record, request_fingerprint):
+    if record.fingerprint != request_fingerprint:
+        return Response(
+            {"error": f"{HEADER} was already used for a different request"},
+            status=422
+        )
+    response = Response(record.response_body, status=record.status_code)
+    response["Idempotent-Replayed"] = "true"
+    return response
+
+
+def idempotent(view_method):
+    """
+    Make a POST handler safe to retry when the client sends an
+    Idempotency-Key header.
+
+    The key is claimed by inserting its row at the start of a transaction
+    that also runs the handler and stores the response, so the outcome and
+    the key commit together. A retry after that is answered from the
+    stored row without running the handler again. A concurrent duplicate
+    blocks on the unique (user, key) index until the first request
+    finishes, then gets its response; if the first request failed and
+    rolled back, the duplicate runs normally. Requests without the header
+    are unaffected.
+    """
+    @wraps(view_method)
+    def wrapper(self, request, *args, **kwargs):
+        key = request.headers.get(HEADER)
+        if not key:
+            return view_method(self, request, *args, **kwargs)
+        if len(key) > MAX_KEY_LENGTH:
+            return Response({"error": f"{HEADER} is too long"}, status=400)
+
+        request_fingerprint = fingerprint(request)
+        records = IdempotencyKey.objects.filter(user=request.user, key=key)
+
+        record = records.filter(expires_at__gt=timezone.now()).first()
+        if record is not None:
+            return replay(record, request_fingerprint)
+
+        try:
+            with transaction.atomic():
+                records.filter(expires_at__lte=timezone.now()).delete()
+                record = IdempotencyKey.objects.create(
+                    user=request.user,
+                    key=key,
+                    fingerprint=request_fingerprint,
+                    expires_at=timezone.now() + timedelta(seconds=settings.IDEMPOTENCY_KEY_TTL),
+                )
+                response = view_method(self, request, *args, **kwargs)
+                record.status_code = response.status_code
+                record.response_body = response.data
+                record.save(update_fields=["status_code", "response_body"])
+                return response
+        except IntegrityError:
+            # Lost the race: the first request has committed by now
+            record = records.first()
+            if record is None:
+                raise
+            return replay(record, request_fingerprint)
+
+    return wrapper
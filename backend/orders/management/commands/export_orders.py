@@ -0,0 +1,44 @@
+import sys
+
+from django.core.management.base import BaseCommand, CommandError
+from django.http import QueryDict
+
+from orders.export import FORMATS, export_lines
+from orders.filters import filter_status_and_dates
+from orders.models import Order
+
+
+class Command(BaseCommand):
+    help = "Dump orders with their items as NDJSON or CSV, streaming in constant memory"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--format', choices=FORMATS, default='ndjson')
+        parser.add_argument('--output', help="File to write (default: stdout)")
+        parser.add_argument('--date-from')
+        parser.add_argument('--date-to')
+        parser.add_argument('--status', action='append', default=[])
+        parser.add_argument('--chunk-size', type=int, default=500)
+
+    def handle(self, *args, **options):
+        params = QueryDict(mutable=True)
+        params.setlist('status', options['status'])
+        for name in ('date_from', 'date_to'):
+            if options[name]:
+                params[name] = options[name]
+        try:
+            orders = filter_status_and_dates(Order.objects.all(), params, 'order_status', 'created_at')
+        except ValueError as e:
+            raise CommandError(str(e))
+
+        lines = export_lines(options['format'], orders, options['chunk_size'])
+        out = open(options['output'], 'w', newline='') if options['output'] else sys.stdout
+        try:
+            count = 0
+            for line in lines:
+                out.write(line)
+                count += 1
+        finally:
+            if options['output']:
+                out.close()
+
+        self.stderr.write(self.style.SUCCESS(f"Wrote {count} lines"))
@@ -0,0 +1,39 @@
+# Generated by Django 5.2.18 on 2026-10-17 06:12
+
+import django.utils.timezone
+from django.db import migrations, models
+from django.db.models import OuterRef, Subquery
+
+
+def copy_order_dates(apps, schema_editor):
+    Order = apps.get_model('orders', 'Order')
+    OrderItem = apps.get_model('orders', 'OrderItem')
+    OrderItem.objects.update(
+        ordered_at=Subquery(Order.objects.filter(pk=OuterRef('order_id')).values('created_at')[:1])
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounts', '0005_keyset_indexes'),
+        ('orders', '0005_checkout_request'),
+        ('products', '0010_stock_hold'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='orderitem',
+            name='ordered_at',
+            field=models.DateTimeField(default=django.utils.timezone.now),
+        ),
+        migrations.RunPython(copy_order_dates, migrations.RunPython.noop),
+        migrations.AddIndex(
+            model_name='orderitem',
+            index=models.Index(fields=['seller', 'status', 'id'], name='orderitem_seller_status_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='orderitem',
+            index=models.Index(fields=['seller', 'ordered_at', 'id'], name='orderitem_seller_date_idx'),
+        ),
+    ]
@@ -0,0 +1,23 @@
+# Generated by Django 5.2.18 on 2026-10-17 06:36
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounts', '0005_keyset_indexes'),
+        ('orders', '0006_orderitem_seller_feed'),
+        ('products', '0010_stock_hold'),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name='orderitem',
+            name='orderitem_seller_status_idx',
+        ),
+        migrations.AddIndex(
+            model_name='orderitem',
+            index=models.Index(fields=['seller', 'status', 'ordered_at', 'id'], name='orderitem_seller_status_dt_idx'),
+        ),
+    ]
@@ -1,7 +1,21 @@
+import uuid
+
+from django.core.serializers.json import DjangoJSONEncoder
 from django.db import models
-from accounts.models import CustomerProfile, SellerProfile
+from django.utils import timezone
+from accounts.models import CustomerProfile, SellerProfile, User
 from products.models import Product
 
+class OrderQuerySet(models.QuerySet):
+    def with_items(self):
+        return self.prefetch_related(
+            models.Prefetch(
+                'orderitem_set',
+                queryset=OrderItem.objects.select_related('product', 'seller')
+            )
+        )
+
+
 class Order(models.Model):
     customer = models.ForeignKey(CustomerProfile, on_delete=models.PROTECT)
     order_status = models.CharField(
@@ -17,6 +31,22 @@ class Order(models.Model):
     total_amount = models.DecimalField(max_digits=10, decimal_places=2)
     shipping_address_id = models.BigIntegerField()
     created_at = models.DateTimeField(auto_now_add=True)
+    # Bumped whenever the order or one of its items changes
+    updated_at = models.DateTimeField(auto_now=True)
+
+    objects = OrderQuerySet.as_manager()
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['customer', 'created_at', 'id'], name='order_customer_created_idx'),
+            models.Index(fields=['customer', 'updated_at'], name='order_customer_updated_idx'),
+            models.Index(fields=['created_at', 'id'], name='order_created_id_idx'),
+        ]
+
+
+    def touch(self):
+        self.updated_at = timezone.now()
+        Order.objects.filter(pk=self.pk).update(updated_at=self.updated_at)
 
 
 class OrderItem(models.Model):
@@ -35,3 +65,63 @@ class OrderItem(models.Model):
         ],
         default='PLACED'
     )
+    # Copy of order.created_at so seller feeds filter on one table
+    ordered_at = models.DateTimeField(default=timezone.now)
+
+    class Meta:
+        indexes = [
+            # Seller feed: status filter + newest-first keyset on (ordered_at, id)
+            models.Index(fields=['seller', 'status', 'ordered_at', 'id'], name='orderitem_seller_status_dt_idx'),
+            # Seller feed: date range without a status filter
+            models.Index(fields=['seller', 'ordered_at', 'id'], name='orderitem_seller_date_idx'),
+        ]
+
+
+class IdempotencyKey(models.Model):
+    """Outcome of a request sent with an Idempotency-Key header, replayed on retries."""
+    user = models.ForeignKey(User, on_delete=models.CASCADE)
+    key = models.CharField(max_length=64)
+    # Hash of method, path and body; a key may not be reused for another request
+    fingerprint = models.CharField(max_length=64)
+    # Filled in before the claiming transaction commits
+    status_code = models.PositiveSmallIntegerField(null=True)
+    response_body = models.JSONField(encoder=DjangoJSONEncoder, null=True)
+    expires_at = models.DateTimeField(db_index=True)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['user', 'key'], name='unique_user_idempotency_key'),
+        ]
+
+
+class CheckoutRequest(models.Model):
+    """
+    A queued checkout (async mode). Workers in orders.queue turn it into
+    an Order; the client polls it by ticket.
+    """
+    QUEUED = 'QUEUED'
+    DONE = 'DONE'
+    FAILED = 'FAILED'
+    STATUS_CHOICES = [
+        (QUEUED, 'Queued'),
+        (DONE, 'Done'),
+        (FAILED, 'Failed'),
+    ]
+
+    ticket = models.UUIDField(default=uuid.uuid4, unique=True, editable=False)
+    customer = models.ForeignKey(CustomerProfile, on_delete=models.CASCADE)
+    shipping_address_id = models.BigIntegerField()
+    items = models.JSONField()
+    # Lowest product id in the request; workers batch requests by it
+    batch_key = models.BigIntegerField()
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default=QUEUED)
+    order = models.ForeignKey(Order, null=True, blank=True, on_delete=models.SET_NULL)
+    error = models.CharField(max_length=255, blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['status', 'id'], name='checkout_request_queue_idx'),
+            models.Index(fields=['status', 'batch_key', 'id'], name='checkout_request_batch_idx'),
+        ]
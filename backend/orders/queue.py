@@ -0,0 +1,106 @@
+"""
+Database-backed checkout queue.
+
+``enqueue`` stores a CheckoutRequest and returns straight away. Workers
+(``run_checkout_workers``) claim queued requests in batches that share a
+``batch_key`` (their lowest product id), so requests for the same hot
+product are placed back to back by one worker under a single set of row
+locks instead of many web workers queueing on the same lock. A batch is
+claimed and processed in one transaction; if a worker dies, the batch
+rolls back and is picked up again.
+"""
+import logging
+import time
+
+from django.db import OperationalError, close_old_connections, connection, transaction
+from django.http import Http404
+from django.utils import timezone
+
+from accounts.models import Address
+from products.models import Product
+from .checkout import CheckoutError, place_order
+from .models import CheckoutRequest
+
+logger = logging.getLogger(__name__)
+
+
+def enqueue(customer, address, items):
+    return CheckoutRequest.objects.create(
+        customer=customer,
+        shipping_address_id=address.id,
+        items=items,
+        batch_key=min(item["product_id"] for item in items),
+    )
+
+
+def claim_batch(batch_size):
+    """Lock the oldest queued request and up to ``batch_size`` others for the same product."""
+    queued = CheckoutRequest.objects.filter(status=CheckoutRequest.QUEUED).order_by('id')
+    if connection.features.has_select_for_update_skip_locked:
+        queued = queued.select_for_update(skip_locked=True)
+
+    head = queued.values_list('batch_key', flat=True).first()
+    if head is None:
+        return []
+    return list(queued.filter(batch_key=head).select_related('customer')[:batch_size])
+
+
+@transaction.atomic
+def process_batch(batch_size=50):
+    """Place one batch of queued checkouts; returns how many were handled."""
+    batch = claim_batch(batch_size)
+    if not batch:
+        return 0
+
+    # Every product the batch touches, locked once up front in id order
+    product_ids = {item["product_id"] for request in batch for item in request.items}
+    list(Product.objects.select_for_update().filter(pk__in=product_ids).order_by('id').values_list('id'))
+
+    addresses = {
+        address.id: address
+        for address in Address.objects.filter(pk__in={r.shipping_address_id for r in batch})
+    }
+    for request in batch:
+        address = addresses.get(request.shipping_address_id)
+        try:
+            if address is None:
+                raise Http404
+            request.order = place_order(request.customer, address, request.items)
+            request.status = CheckoutRequest.DONE
+        except CheckoutError as e:
+            request.status = CheckoutRequest.FAILED
+            request.error = str(e)[:255]
+        except Http404:
+            request.status = CheckoutRequest.FAILED
+            request.error = "Product or address not found"
+        except OperationalError:
+            # Lock wait / deadlock: retry the whole batch later
+            raise
+        except Exception:
+            # Only this request's savepoint is rolled back; don't let one bad
+            # request block the queue
+            logger.exception("Checkout request %s failed", request.ticket)
+            request.status = CheckoutRequest.FAILED
+            request.error = "Internal error"
+        request.updated_at = timezone.now()
+
+    CheckoutRequest.objects.bulk_update(batch, ['status', 'order', 'error', 'updated_at'])
+    return len(batch)
+
+
+def run_worker(batch_size=50, poll_interval=0.5, once=False):
+    """Drain the queue forever (or until empty with ``once``)."""
+    while True:
+        try:
+            handled = process_batch(batch_size)
+        except Exception:
+            logger.exception("Checkout batch failed; it will be retried")
+            handled = 0
+            time.sleep(poll_interval)
+        finally:
+            close_old_connections()
+
+        if not handled:
+            if once:
+                return
+            time.sleep(poll_interval)
@@ -29,7 +29,8 @@ class OrderItemSerializer(serializers.ModelSerializer):
             'seller_name',
             'quantity',
             'price',
-            'status'
+            'status',
+            'ordered_at'
         ]
 
 class OrderSerializer(serializers.ModelSerializer):
@@ -55,3 +56,7 @@ class CancelOrderItemSerializer(serializers.ModelSerializer):
     class Meta:
         model = OrderItem
         fields = []
+
+class CheckoutItemSerializer(serializers.Serializer):
+    product_id = serializers.IntegerField()
+    quantity = serializers.IntegerField(min_value=1)
@@ -0,0 +1,86 @@
+from django.db import transaction
+from django.db.models import Count, Q
+from django.utils import timezone
+
+from .models import Order, OrderItem
+
+MAX_BULK_ITEMS = 1000
+
+# Target status -> statuses a seller may move an item from
+SELLER_TRANSITIONS = {
+    'SHIPPED': {'PLACED'},
+    'DELIVERED': {'SHIPPED'},
+}
+
+
+def derived_status(counts):
+    """Order status from its item counts: the least advanced live item wins."""
+    live = counts['total'] - counts['cancelled']
+    if not live:
+        return 'CANCELLED'
+    if counts['delivered'] == live:
+        return 'DELIVERED'
+    if counts['shipped'] + counts['delivered'] == live:
+        return 'SHIPPED'
+    return 'PLACED'
+
+
+def rollup_order_status(order_ids):
+    """
+    Recompute Order.order_status (and bump updated_at) for ``order_ids``
+    from one grouped aggregate over their items, then one UPDATE per
+    resulting status.
+    """
+    counts = (
+        OrderItem.objects.filter(order_id__in=order_ids)
+        .values('order_id')
+        .annotate(
+            total=Count('id'),
+            cancelled=Count('id', filter=Q(status='CANCELLED')),
+            shipped=Count('id', filter=Q(status='SHIPPED')),
+            delivered=Count('id', filter=Q(status='DELIVERED')),
+        )
+        .order_by()
+    )
+
+    by_status = {}
+    for row in counts:
+        by_status.setdefault(derived_status(row), []).append(row['order_id'])
+
+    now = timezone.now()
+    for order_status, ids in by_status.items():
+        Order.objects.filter(pk__in=ids).update(order_status=order_status, updated_at=now)
+
+
+@transaction.atomic
+def bulk_transition(seller, item_ids, target):
+    """
+    Move the seller's items to ``target`` where the transition is allowed.
+    Items are locked in id order, changed with one UPDATE, and the parent
+    orders' status is rolled up in the same transaction. Returns
+    ``(updated_count, errors)``.
+    """
+    allowed = SELLER_TRANSITIONS[target]
+    items = {
+        row['id']: row
+        for row in OrderItem.objects.select_for_update()
+        .filter(seller=seller, pk__in=item_ids)
+        .order_by('id')
+        .values('id', 'status', 'order_id')
+    }
+
+    errors = []
+    valid = []
+    for item_id in dict.fromkeys(item_ids):
+        item = items.get(item_id)
+        if item is None:
+            errors.append({'id': item_id, 'error': 'not_found'})
+        elif item['status'] not in allowed:
+            errors.append({'id': item_id, 'error': 'invalid_transition', 'status': item['status']})
+        else:
+            valid.append(item_id)
+
+    if valid:
+        OrderItem.objects.filter(pk__in=valid).update(status=target)
+        rollup_order_status({items[pk]['order_id'] for pk in valid})
+    return len(valid), errors
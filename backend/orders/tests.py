@@ -1,3 +1,532 @@
-from django.test import TestCase
+import csv
+import json
+import os
+import tempfile
+import threading
+from datetime import timedelta
+from io import StringIO
 
-# Create your tests here.
+from django.core.management import call_command
+from django.db import connection
+from django.test import TransactionTestCase, skipUnlessDBFeature
+from django.utils import timezone
+from rest_framework.test import APIClient, APITestCase
+
+from accounts.models import Address, CustomerProfile, SellerProfile, User
+from backend.testing import QueryCountMixin
+from products.holds import expire_holds
+from products.models import Category, Product, StockHold
+from .export import iter_orders
+from .models import Order, OrderItem
+from .queue import process_batch
+
+
+class OrderReadQueryTests(QueryCountMixin, APITestCase):
+    def setUp(self):
+        self.customer_user = User.objects.create_user('customer@example.com', 'pass', role='CUSTOMER')
+        self.customer = CustomerProfile.objects.create(user=self.customer_user)
+
+        self.sellers = []
+        for i in range(2):
+            user = User.objects.create_user(f'seller{i}@example.com', 'pass', role='SELLER')
+            self.sellers.append(
+                SellerProfile.objects.create(user=user, store_name=f'Store {i}', is_verified=True)
+            )
+
+        category = Category.objects.create(name='Electronics')
+        self.products = [
+            Product.objects.create(
+                seller=seller,
+                category=category,
+                title=f'Product {i}',
+                description='',
+                price=100,
+                stock_quantity=100,
+            )
+            for i, seller in enumerate(self.sellers)
+        ]
+
+    def grow_orders(self, size):
+        for _ in range(Order.objects.count(), size):
+            order = Order.objects.create(
+                customer=self.customer, total_amount=200, shipping_address_id=1
+            )
+            for product in self.products:
+                OrderItem.objects.create(
+                    order=order,
+                    product=product,
+                    seller=product.seller,
+                    quantity=1,
+                    price=product.price,
+                )
+
+    def test_customer_orders_query_count_is_constant(self):
+        self.client.force_authenticate(self.customer_user)
+        self.assertConstantQueries(
+            self.grow_orders,
+            lambda: self.client.get('/api/orders/my-orders/'),
+        )
+
+    def test_customer_orders_cursor_query_count_is_constant(self):
+        self.client.force_authenticate(self.customer_user)
+        self.assertConstantQueries(
+            self.grow_orders,
+            lambda: self.client.get('/api/orders/my-orders/', {'cursor': '', 'page_size': 50}),
+        )
+
+    def test_customer_orders_revalidate(self):
+        self.client.force_authenticate(self.customer_user)
+        self.grow_orders(1)
+        etag = self.client.get('/api/orders/my-orders/')['ETag']
+        self.assertEqual(self.client.get('/api/orders/my-orders/', HTTP_IF_NONE_MATCH=etag).status_code, 304)
+
+        self.grow_orders(2)
+        self.assertEqual(self.client.get('/api/orders/my-orders/', HTTP_IF_NONE_MATCH=etag).status_code, 200)
+
+    def test_seller_orders_query_count_is_constant(self):
+        self.client.force_authenticate(self.sellers[0].user)
+        self.assertConstantQueries(
+            self.grow_orders,
+            lambda: self.client.get('/api/orders/seller-orders/'),
+        )
+
+    def test_admin_orders_query_count_is_constant(self):
+        admin = User.objects.create_superuser('admin@example.com', 'pass')
+        self.client.force_authenticate(admin)
+        self.assertConstantQueries(
+            self.grow_orders,
+            lambda: self.client.get('/api/orders/admin/all-orders/'),
+        )
+
+
+def make_checkout_fixture(stock=10, products=2, customers=1):
+    seller_user = User.objects.create_user('seller@example.com', 'pass', role='SELLER')
+    seller = SellerProfile.objects.create(user=seller_user, store_name='Store', is_verified=True)
+    category = Category.objects.create(name='Electronics')
+    items = [
+        Product.objects.create(
+            seller=seller,
+            category=category,
+            title=f'Product {i}',
+            description='',
+            price=100,
+            stock_quantity=stock,
+        )
+        for i in range(products)
+    ]
+
+    buyers = []
+    for i in range(customers):
+        user = User.objects.create_user(f'customer{i}@example.com', 'pass', role='CUSTOMER')
+        customer = CustomerProfile.objects.create(user=user)
+        address = Address.objects.create(
+            customer=customer, full_name='C', phone='1', address_line='A',
+            city='X', state='Y', pincode='1',
+        )
+        buyers.append((user, address))
+    return items, buyers
+
+
+class CheckoutTests(APITestCase):
+    def setUp(self):
+        self.products, buyers = make_checkout_fixture()
+        self.user, self.address = buyers[0]
+        self.client.force_authenticate(self.user)
+
+    def checkout(self, items):
+        return self.client.post(
+            '/api/orders/checkout/',
+            {'address_id': self.address.id, 'items': items},
+            format='json',
+        )
+
+    def test_checkout_creates_items_and_decrements_stock(self):
+        first, second = self.products
+        response = self.checkout([
+            {'product_id': second.id, 'quantity': 2},
+            {'product_id': first.id, 'quantity': 1},
+            {'product_id': second.id, 'quantity': 1},
+        ])
+        self.assertEqual(response.status_code, 201, response.data)
+
+        order = Order.objects.get(pk=response.data['order_id'])
+        self.assertEqual(order.total_amount, 400)
+        self.assertEqual(
+            dict(order.orderitem_set.values_list('product_id', 'quantity')),
+            {first.id: 1, second.id: 3},
+        )
+        first.refresh_from_db()
+        second.refresh_from_db()
+        self.assertEqual((first.stock_quantity, second.stock_quantity), (9, 7))
+
+    def test_insufficient_stock_writes_nothing(self):
+        first, second = self.products
+        response = self.checkout([
+            {'product_id': first.id, 'quantity': 1},
+            {'product_id': second.id, 'quantity': 11},
+        ])
+        self.assertEqual(response.status_code, 400)
+        self.assertFalse(Order.objects.exists())
+        first.refresh_from_db()
+        self.assertEqual(first.stock_quantity, 10)
+
+    def test_sold_out_product_is_no_longer_listable(self):
+        product = self.products[0]
+        self.checkout([{'product_id': product.id, 'quantity': 10}])
+        product.refresh_from_db()
+        self.assertFalse(product.is_listable)
+
+    def test_query_count_does_not_grow_with_lines(self):
+        with self.assertNumQueries(10):
+            self.checkout([{'product_id': self.products[0].id, 'quantity': 1}])
+        with self.assertNumQueries(10):
+            self.checkout([{'product_id': p.id, 'quantity': 1} for p in self.products])
+
+
+class IdempotentCheckoutTests(APITestCase):
+    def setUp(self):
+        self.products, buyers = make_checkout_fixture()
+        self.user, self.address = buyers[0]
+        self.client.force_authenticate(self.user)
+
+    def checkout(self, key, quantity=1):
+        return self.client.post(
+            '/api/orders/checkout/',
+            {'address_id': self.address.id, 'items': [{'product_id': self.products[0].id, 'quantity': quantity}]},
+            format='json',
+            HTTP_IDEMPOTENCY_KEY=key,
+        )
+
+    def test_retry_replays_the_first_response(self):
+        first = self.checkout('abc')
+        retry = self.checkout('abc')
+
+        self.assertEqual(retry.status_code, 201)
+        self.assertEqual(retry.data['order_id'], first.data['order_id'])
+        self.assertEqual(retry['Idempotent-Replayed'], 'true')
+        self.assertEqual(Order.objects.count(), 1)
+        self.products[0].refresh_from_db()
+        self.assertEqual(self.products[0].stock_quantity, 9)
+
+    def test_key_reused_for_another_request_is_rejected(self):
+        self.checkout('abc')
+        self.assertEqual(self.checkout('abc', quantity=2).status_code, 422)
+        self.assertEqual(self.checkout('other', quantity=2).status_code, 201)
+
+
+class AsyncCheckoutTests(APITestCase):
+    def setUp(self):
+        self.products, buyers = make_checkout_fixture(stock=1)
+        self.user, self.address = buyers[0]
+        self.client.force_authenticate(self.user)
+
+    def checkout(self):
+        return self.client.post(
+            '/api/orders/checkout/?mode=async',
+            {'address_id': self.address.id, 'items': [{'product_id': self.products[0].id, 'quantity': 1}]},
+            format='json',
+        )
+
+    def test_queued_checkouts_are_placed_by_the_worker(self):
+        first, second = self.checkout(), self.checkout()
+        self.assertEqual(first.status_code, 202)
+        self.assertEqual(self.client.get(first.data['status_url']).data['status'], 'QUEUED')
+
+        self.assertEqual(process_batch(), 2)
+
+        first, second = (self.client.get(r.data['status_url']).data for r in (first, second))
+        self.assertEqual(first['status'], 'DONE')
+        self.assertEqual(Order.objects.get().pk, first['order_id'])
+        self.assertEqual(second['status'], 'FAILED')
+        self.assertIn('Insufficient stock', second['error'])
+
+
+class BulkOrderStatusTests(APITestCase):
+    def setUp(self):
+        products, buyers = make_checkout_fixture(products=2)
+        user, address = buyers[0]
+        self.client.force_authenticate(user)
+        response = self.client.post(
+            '/api/orders/checkout/',
+            {'address_id': address.id, 'items': [{'product_id': p.id, 'quantity': 1} for p in products]},
+            format='json',
+        )
+        self.order = Order.objects.get(pk=response.data['order_id'])
+        self.items = list(self.order.orderitem_set.order_by('id').values_list('id', flat=True))
+        self.client.force_authenticate(products[0].seller.user)
+
+    def bulk(self, item_ids, target):
+        return self.client.post(
+            '/api/orders/seller/bulk-update-status/',
+            {'item_ids': item_ids, 'status': target},
+            format='json',
+        )
+
+    def order_status(self):
+        self.order.refresh_from_db()
+        return self.order.order_status
+
+    def test_order_status_follows_items(self):
+        self.assertEqual(self.bulk(self.items[:1], 'SHIPPED').data['updated'], 1)
+        self.assertEqual(self.order_status(), 'PLACED')
+
+        self.bulk(self.items, 'SHIPPED')
+        self.assertEqual(self.order_status(), 'SHIPPED')
+
+        self.bulk(self.items, 'DELIVERED')
+        self.assertEqual(self.order_status(), 'DELIVERED')
+
+    def test_invalid_transitions_and_unknown_items_are_reported(self):
+        response = self.bulk(self.items + [999999], 'DELIVERED')
+        self.assertEqual(response.data['updated'], 0)
+        self.assertEqual(
+            [e['error'] for e in response.data['errors']],
+            ['invalid_transition', 'invalid_transition', 'not_found'],
+        )
+        self.assertEqual(self.bulk(self.items, 'CANCELLED').status_code, 400)
+
+
+class StockHoldTests(APITestCase):
+    def setUp(self):
+        self.products, buyers = make_checkout_fixture(stock=3, customers=2)
+        (self.user, self.address), (self.other, self.other_address) = buyers
+        self.client.force_authenticate(self.user)
+        self.product = self.products[0]
+
+    def reserve(self, quantity, user=None):
+        self.client.force_authenticate(user or self.user)
+        return self.client.post(
+            '/api/orders/reserve/',
+            {'items': [{'product_id': self.product.id, 'quantity': quantity}]},
+            format='json',
+        )
+
+    def checkout(self, quantity, user=None, address=None):
+        self.client.force_authenticate(user or self.user)
+        return self.client.post(
+            '/api/orders/checkout/',
+            {'address_id': (address or self.address).id,
+             'items': [{'product_id': self.product.id, 'quantity': quantity}]},
+            format='json',
+        )
+
+    def stock(self):
+        self.product.refresh_from_db()
+        return self.product.stock_quantity
+
+    def test_hold_sets_units_aside_and_checkout_sells_them(self):
+        self.assertEqual(self.reserve(2).status_code, 200)
+        self.assertEqual(self.stock(), 3)
+
+        response = self.reserve(2, user=self.other)
+        self.assertEqual(response.status_code, 409)
+        self.assertEqual(response.data['details'][0]['available'], 1)
+        self.assertEqual(self.checkout(2, self.other, self.other_address).status_code, 400)
+
+        response = self.checkout(2)
+        self.assertEqual(response.status_code, 201, response.data)
+        self.assertEqual(self.stock(), 1)
+        self.assertFalse(StockHold.objects.exists())
+
+    def test_rehold_adjusts_and_over_hold_is_rejected(self):
+        self.reserve(2)
+        self.reserve(1)
+        self.assertEqual(StockHold.objects.get().quantity, 1)
+
+        response = self.reserve(4)
+        self.assertEqual(response.status_code, 409)
+        self.assertEqual(response.data['details'][0]['available'], 3)
+        self.assertEqual(StockHold.objects.get().quantity, 1)
+
+    def test_expired_holds_stop_counting(self):
+        self.reserve(3)
+        self.assertEqual(self.checkout(1, self.other, self.other_address).status_code, 400)
+        StockHold.objects.update(expires_at=timezone.now() - timedelta(seconds=1))
+
+        self.assertEqual(self.checkout(1, self.other, self.other_address).status_code, 201)
+        self.assertEqual(sum(expire_holds()), 1)
+        self.assertEqual(self.stock(), 2)
+
+    def test_absolute_stock_writes_are_physical_stock(self):
+        self.reserve(2)
+        seller = self.product.seller
+        self.client.force_authenticate(seller.user)
+        response = self.client.post(
+            '/api/products/seller/products/batch-update/',
+            {'items': [{'id': self.product.id, 'stock_quantity': 5}]},
+            format='json',
+        )
+        self.assertEqual(response.status_code, 200)
+
+        StockHold.objects.update(expires_at=timezone.now() - timedelta(seconds=1))
+        sum(expire_holds())
+        self.assertEqual(self.stock(), 5)
+
+    def test_deleting_a_hold_leaves_stock_alone(self):
+        self.reserve(2)
+        self.user.customerprofile.stock_holds.all().delete()
+        self.assertEqual(self.stock(), 3)
+        self.assertEqual(self.reserve(3, user=self.other).status_code, 200)
+
+
+class SellerOrderFeedTests(APITestCase):
+    url = '/api/orders/seller-orders/'
+
+    def setUp(self):
+        (self.product, _), buyers = make_checkout_fixture()
+        user, address = buyers[0]
+        order = Order.objects.create(
+            customer=user.customerprofile, total_amount=100, shipping_address_id=address.id
+        )
+        now = timezone.now()
+        self.items = [
+            OrderItem.objects.create(
+                order=order, product=self.product, seller=self.product.seller,
+                quantity=1, price=100, status=item_status,
+                ordered_at=now - timedelta(days=days),
+            )
+            for days, item_status in [(5, 'PLACED'), (1, 'SHIPPED'), (3, 'PLACED'), (0, 'DELIVERED'), (2, 'PLACED')]
+        ]
+        self.client.force_authenticate(self.product.seller.user)
+
+    def ids(self, response):
+        return [item['id'] for item in response.data['results']]
+
+    def test_feed_is_paginated_newest_first(self):
+        response = self.client.get(self.url, {'page_size': 2})
+        seen = self.ids(response)
+        while response.data['next']:
+            response = self.client.get(response.data['next'])
+            seen += self.ids(response)
+
+        by_date = sorted(self.items, key=lambda item: item.ordered_at, reverse=True)
+        self.assertEqual(seen, [item.id for item in by_date])
+
+    def test_status_and_date_filters(self):
+        response = self.client.get(self.url, {'status': 'PLACED,SHIPPED'})
+        self.assertEqual(
+            self.ids(response), [self.items[i].id for i in (1, 4, 2, 0)]
+        )
+
+        day = (timezone.localdate() - timedelta(days=3)).isoformat()
+        response = self.client.get(self.url, {'status': 'PLACED', 'date_from': day})
+        self.assertEqual(self.ids(response), [self.items[4].id, self.items[2].id])
+
+        response = self.client.get(self.url, {'date_to': day})
+        self.assertEqual(self.ids(response), [self.items[2].id, self.items[0].id])
+
+    def test_bad_filters_are_rejected(self):
+        self.assertEqual(self.client.get(self.url, {'status': 'LOST'}).status_code, 400)
+        self.assertEqual(self.client.get(self.url, {'date_from': 'yesterday'}).status_code, 400)
+        self.assertEqual(self.client.get(self.url, {'cursor': 'not-a-cursor'}).status_code, 404)
+
+
+class OrderExportTests(APITestCase):
+    def setUp(self):
+        (self.product, self.other), buyers = make_checkout_fixture()
+        self.product.title = '=HYPERLINK("http://evil.example")'
+        self.product.save()
+        customer = buyers[0][0].customerprofile
+
+        self.orders = []
+        for i in range(3):
+            order = Order.objects.create(
+                customer=customer, total_amount=200, shipping_address_id=buyers[0][1].id,
+                order_status='DELIVERED' if i == 2 else 'PLACED',
+            )
+            for product in (self.product, self.other):
+                OrderItem.objects.create(
+                    order=order, product=product, seller=product.seller, quantity=1, price=100
+                )
+            self.orders.append(order)
+        self.orders.append(Order.objects.create(
+            customer=customer, total_amount=0, shipping_address_id=buyers[0][1].id
+        ))
+        self.client.force_authenticate(User.objects.create_superuser('admin@example.com', 'pass'))
+
+    def stream(self, url, params=None):
+        response = self.client.get(url, params or {})
+        self.assertEqual(response.status_code, 200)
+        return b''.join(response.streaming_content).decode()
+
+    def test_csv_has_a_row_per_item_and_escapes_formulas(self):
+        rows = list(csv.DictReader(StringIO(self.stream('/api/orders/admin/export/csv/'))))
+
+        self.assertEqual(len(rows), 3 * 2 + 1)
+        self.assertEqual([r['order_id'] for r in rows[-1:]], [str(self.orders[-1].id)])
+        self.assertEqual(rows[-1]['item_id'], '')
+        titles = {r['product_title'] for r in rows if r['product_id'] == str(self.product.id)}
+        self.assertEqual(titles, {"'" + self.product.title})
+
+    def test_ndjson_filters_by_status(self):
+        lines = self.stream('/api/orders/admin/export/ndjson/', {'status': 'DELIVERED'}).splitlines()
+        orders = [json.loads(line) for line in lines]
+
+        self.assertEqual([o['id'] for o in orders], [self.orders[2].id])
+        self.assertEqual(len(orders[0]['items']), 2)
+
+    def test_bad_requests(self):
+        self.assertEqual(self.client.get('/api/orders/admin/export/xml/').status_code, 404)
+        self.assertEqual(self.client.get('/api/orders/admin/export/csv/', {'status': 'LOST'}).status_code, 400)
+
+    def test_chunks_cover_every_order_once(self):
+        # Two full chunks (orders + items each), then an empty third page
+        with self.assertNumQueries(5):
+            seen = [order.id for order in iter_orders(Order.objects.all(), chunk_size=2)]
+        self.assertEqual(seen, [order.id for order in self.orders])
+
+    def test_command_writes_the_export(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, 'orders.ndjson')
+            call_command('export_orders', '--output', path, '--status', 'PLACED', stderr=StringIO())
+            with open(path) as f:
+                ids = [json.loads(line)['id'] for line in f]
+        self.assertEqual(ids, [order.id for order in self.orders if order.order_status == 'PLACED'])
+
+
+@skipUnlessDBFeature('has_select_for_update')
+class ConcurrentCheckoutTests(TransactionTestCase):
+    """
+    Many customers buying the same hot SKU at once: exactly ``stock``
+    orders succeed (no oversell, no deadlock). Needs row locks, so it
+    only runs on MySQL / PostgreSQL.
+    """
+    buyers = 16
+    stock = 10
+
+    def test_hot_sku_is_never_oversold(self):
+        (product,), buyers = make_checkout_fixture(
+            stock=self.stock, products=1, customers=self.buyers
+        )
+        barrier = threading.Barrier(self.buyers)
+        results = []
+        errors = []
+
+        def buy(user, address):
+            client = APIClient()
+            client.force_authenticate(user)
+            try:
+                barrier.wait()
+                response = client.post(
+                    '/api/orders/checkout/',
+                    {'address_id': address.id, 'items': [{'product_id': product.id, 'quantity': 1}]},
+                    format='json',
+                )
+                results.append(response.status_code)
+            except Exception as e:  # surfaced below
+                errors.append(e)
+            finally:
+                connection.close()
+
+        workers = [threading.Thread(target=buy, args=buyer) for buyer in buyers]
+        for worker in workers:
+            worker.start()
+        for worker in workers:
+            worker.join()
+
+        self.assertEqual(errors, [])
+        self.assertEqual(results.count(201), self.stock)
+        self.assertEqual(results.count(400), self.buyers - self.stock)
+        product.refresh_from_db()
+        self.assertEqual(product.stock_quantity, 0)
+        self.assertEqual(OrderItem.objects.filter(product=product).count(), self.stock)
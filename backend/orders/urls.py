@@ -1,12 +1,17 @@
 from django.urls import path
-from .views import CheckoutView, CustomerOrdersView, SellerOrdersView, UpdateOrderStatusView, AdminOrdersView, CancelOrderItemView
+from .views import CheckoutView, CustomerOrdersView, SellerOrdersView, UpdateOrderStatusView, AdminOrdersView, CancelOrderItemView, ReserveStockView, CheckoutStatusView, AdminOrderExportView
+from .views import BulkUpdateOrderStatusView
 
 urlpatterns = [
     path('checkout/', CheckoutView.as_view()),
+    path('checkout/status/<uuid:ticket>/', CheckoutStatusView.as_view()),
+    path('reserve/', ReserveStockView.as_view()),
     path('my-orders/', CustomerOrdersView.as_view()),
     path('seller-orders/', SellerOrdersView.as_view()),
     path('seller/update-status/<int:order_item_id>/', UpdateOrderStatusView.as_view()),
+    path('seller/bulk-update-status/', BulkUpdateOrderStatusView.as_view()),
     path('admin/all-orders/', AdminOrdersView.as_view()),
+    path('admin/export/<str:fmt>/', AdminOrderExportView.as_view()),
     path('cancel/<int:order_item_id>/', CancelOrderItemView.as_view()),
 
 
@@ -3,18 +3,30 @@ from rest_framework.permissions import IsAuthenticated,IsAdminUser
 from rest_framework.response import Response
 from django.db import transaction
 from cart.models import Cart
-from .models import Order, OrderItem
-from .serializers import OrderSerializer, OrderItemSerializer ,OrderStatusUpdateSerializer
+from .models import CheckoutRequest, Order, OrderItem
+from .queue import enqueue
+from .serializers import OrderSerializer, OrderItemSerializer ,OrderStatusUpdateSerializer, CheckoutItemSerializer
+from .checkout import CheckoutError, merge_lines, place_order
+from .idempotency import idempotent
+from products import holds
 import rest_framework.status as status
 from accounts.models import Address
 from django.shortcuts import get_object_or_404
-from products.models import Product 
+from backend.pagination import KeysetPagination
+from django.db.models import Count, Max
+from django.utils.decorators import method_decorator
+from django.views.decorators.http import condition
+import hashlib
+from .filters import filter_status_and_dates
+from .status import MAX_BULK_ITEMS, SELLER_TRANSITIONS, bulk_transition, rollup_order_status
+from . import export
+from django.http import StreamingHttpResponse
 
 
 class CheckoutView(APIView):
     permission_classes = [IsAuthenticated]
 
-    @transaction.atomic
+    @idempotent
     def post(self, request):
         if request.user.role != "CUSTOMER":
             return Response(
@@ -38,6 +50,9 @@ class CheckoutView(APIView):
                 status=status.HTTP_400_BAD_REQUEST
             )
 
+        serializer = CheckoutItemSerializer(data=items, many=True)
+        serializer.is_valid(raise_exception=True)
+
         # ✅ Validate address
         address = get_object_or_404(
             Address,
@@ -45,44 +60,27 @@ class CheckoutView(APIView):
             customer=customer
         )
 
-        total = 0
-
-        # ✅ First pass: validate stock & calculate total
-        for item in items:
-            product = get_object_or_404(Product, id=item["product_id"])
-
-            if product.stock_quantity < item["quantity"]:
-                return Response(
-                    {"error": f"Insufficient stock for {product.title}"},
-                    status=status.HTTP_400_BAD_REQUEST
-                )
-
-            total += product.price * item["quantity"]
-
-      
-        order = Order.objects.create(
-            customer=customer,
-            total_amount=total,
-            shipping_address_id=address.id
-        )
-
-       
-        for item in items:
-            product = Product.objects.select_for_update().get(
-                id=item["product_id"]
+        # ⏳ Async mode: queue it for the checkout workers and hand out a ticket
+        if request.query_params.get("mode") == "async":
+            checkout = enqueue(customer, address, serializer.validated_data)
+            return Response(
+                {
+                    "message": "Order queued",
+                    "ticket": checkout.ticket,
+                    "status_url": f"/api/orders/checkout/status/{checkout.ticket}/"
+                },
+                status=status.HTTP_202_ACCEPTED
             )
 
-            OrderItem.objects.create(
-                order=order,
-                product=product,
-                seller=product.seller,
-                quantity=item["quantity"],
-                price=product.price
+        # ✅ Lock, validate and write everything in one pass
+        try:
+            order = place_order(customer, address, serializer.validated_data)
+        except CheckoutError as e:
+            return Response(
+                {"error": str(e)},
+                status=status.HTTP_400_BAD_REQUEST
             )
 
-            product.stock_quantity -= item["quantity"]
-            product.save()
-
         return Response(
             {
                 "message": "Order placed successfully",
@@ -91,14 +89,102 @@ class CheckoutView(APIView):
             status=status.HTTP_201_CREATED
         )
 
+class CheckoutStatusView(APIView):
+    permission_classes = [IsAuthenticated]
+
+    def get(self, request, ticket):
+        checkout = get_object_or_404(
+            CheckoutRequest.objects.values('ticket', 'status', 'order_id', 'error'),
+            ticket=ticket,
+            customer__user=request.user
+        )
+        response = Response(checkout)
+        if checkout["status"] == CheckoutRequest.QUEUED:
+            response["Retry-After"] = "1"
+        return response
+
+
+class ReserveStockView(APIView):
+    """Hold the items for checkout for a few minutes (see products.holds)."""
+    permission_classes = [IsAuthenticated]
+
+    def post(self, request):
+        if request.user.role != "CUSTOMER":
+            return Response(
+                {"error": "Only customers can reserve stock"},
+                status=status.HTTP_403_FORBIDDEN
+            )
+
+        items = request.data.get("items", [])
+        if not items:
+            return Response(
+                {"error": "Cart is empty"},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+        serializer = CheckoutItemSerializer(data=items, many=True)
+        serializer.is_valid(raise_exception=True)
+
+        try:
+            expires_at = holds.reserve(
+                request.user.customerprofile, merge_lines(serializer.validated_data)
+            )
+        except holds.HoldError as e:
+            return Response(
+                {"error": "Could not reserve stock", "details": e.errors},
+                status=status.HTTP_409_CONFLICT
+            )
+
+        return Response({"message": "Stock reserved", "expires_at": expires_at})
+
+    def delete(self, request):
+        if request.user.role != "CUSTOMER":
+            return Response({"error": "Not allowed"}, status=status.HTTP_403_FORBIDDEN)
+
+        released = holds.release(request.user.customerprofile)
+        return Response({"message": "Reservation released", "released": released})
+
+
+def customer_orders_stamp(request):
+    # (count, latest updated_at) in one aggregate; count catches deletions
+    if not hasattr(request, '_orders_stamp'):
+        request._orders_stamp = Order.objects.filter(
+            customer__user=request.user
+        ).aggregate(count=Count('id'), modified=Max('updated_at'))
+    return request._orders_stamp
+
+
+def customer_orders_etag(request, *args, **kwargs):
+    stamp = customer_orders_stamp(request)
+    if not stamp['count']:
+        return None
+    query = hashlib.md5(request.META.get('QUERY_STRING', '').encode()).hexdigest()[:12]
+    return f"orders-{stamp['count']}-{stamp['modified'].timestamp()}-{query}"
+
+
+def customer_orders_last_modified(request, *args, **kwargs):
+    return customer_orders_stamp(request)['modified']
+
+
 class CustomerOrdersView(APIView):
     permission_classes = [IsAuthenticated]
 
+    @method_decorator(condition(
+        etag_func=customer_orders_etag,
+        last_modified_func=customer_orders_last_modified,
+    ))
     def get(self, request):
         if request.user.role != 'CUSTOMER':
             return Response({"error": "Not allowed"}, status=403)
 
-        orders = Order.objects.filter(customer=request.user.customerprofile)
+        orders = Order.objects.with_items().filter(customer=request.user.customerprofile)
+
+        if KeysetPagination.requested(request):
+            paginator = KeysetPagination()
+            page = paginator.paginate_queryset(orders, request)
+            return paginator.get_paginated_response(OrderSerializer(page, many=True).data)
+
+        orders = orders.order_by('-created_at', '-id')
         serializer = OrderSerializer(orders, many=True)
         return Response(serializer.data)
 
@@ -110,9 +196,19 @@ class SellerOrdersView(APIView):
             return Response({"error": "Not allowed"}, status=403)
 
         seller = request.user.sellerprofile
-        items = OrderItem.objects.filter(seller=seller)
-        serializer = OrderItemSerializer(items, many=True)
-        return Response(serializer.data)
+        items = OrderItem.objects.select_related('product', 'seller').filter(seller=seller)
+
+        # ?status=PLACED,SHIPPED&date_from=2026-01-01&date_to=2026-01-31
+        try:
+            items = filter_status_and_dates(items, request.query_params, 'status', 'ordered_at')
+        except ValueError as e:
+            return Response({"error": str(e)}, status=status.HTTP_400_BAD_REQUEST)
+
+        # Newest first, always one page at a time; served by the
+        # (seller, ordered_at, id) and (seller, status, ordered_at, id) indexes
+        paginator = KeysetPagination(ordering=('-ordered_at', '-id'))
+        page = paginator.paginate_queryset(items, request)
+        return paginator.get_paginated_response(OrderItemSerializer(page, many=True).data)
 
 class UpdateOrderStatusView(APIView):
     permission_classes = [IsAuthenticated]
@@ -132,21 +228,88 @@ class UpdateOrderStatusView(APIView):
         serializer = OrderStatusUpdateSerializer(item, data=request.data)
         serializer.is_valid(raise_exception=True)
         serializer.save()
+        rollup_order_status([item.order_id])
 
         return Response({"message": "Order status updated"})
 
+
+class BulkUpdateOrderStatusView(APIView):
+    permission_classes = [IsAuthenticated]
+
+    def post(self, request):
+        if request.user.role != 'SELLER':
+            return Response({"error": "Not allowed"}, status=403)
+
+        target = request.data.get("status")
+        if target not in SELLER_TRANSITIONS:
+            return Response(
+                {"error": f"status must be one of {', '.join(SELLER_TRANSITIONS)}"},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+        item_ids = request.data.get("item_ids")
+        if (
+            not isinstance(item_ids, list) or not item_ids
+            or not all(isinstance(i, int) and not isinstance(i, bool) for i in item_ids)
+        ):
+            return Response({"error": "item_ids must be a non-empty list of ids"}, status=status.HTTP_400_BAD_REQUEST)
+        if len(item_ids) > MAX_BULK_ITEMS:
+            return Response(
+                {"error": f"At most {MAX_BULK_ITEMS} items per request"},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+        updated, errors = bulk_transition(request.user.sellerprofile, item_ids, target)
+        return Response({
+            "updated": updated,
+            "failed": len(errors),
+            "errors": errors,
+        })
+
 class AdminOrdersView(APIView):
     permission_classes = [IsAdminUser]
 
     def get(self, request):
-        orders = Order.objects.all()
+        orders = Order.objects.with_items()
+
+        if KeysetPagination.requested(request):
+            paginator = KeysetPagination()
+            page = paginator.paginate_queryset(orders, request)
+            return paginator.get_paginated_response(OrderSerializer(page, many=True).data)
+
+        orders = orders.order_by('-created_at', '-id')
         serializer = OrderSerializer(orders, many=True)
         return Response(serializer.data)
 
 
+class AdminOrderExportView(APIView):
+    """Stream all matching orders as NDJSON or CSV (admin/export/<format>/)."""
+    permission_classes = [IsAdminUser]
+
+    def get(self, request, fmt):
+        if fmt not in export.FORMATS:
+            return Response({"error": "Unsupported format"}, status=status.HTTP_404_NOT_FOUND)
+
+        # ?status=PLACED,SHIPPED&date_from=2026-01-01&date_to=2026-01-31
+        try:
+            orders = filter_status_and_dates(
+                Order.objects.all(), request.query_params, 'order_status', 'created_at'
+            )
+        except ValueError as e:
+            return Response({"error": str(e)}, status=status.HTTP_400_BAD_REQUEST)
+
+        response = StreamingHttpResponse(
+            export.export_lines(fmt, orders),
+            content_type=export.CONTENT_TYPES[fmt]
+        )
+        response["Content-Disposition"] = f'attachment; filename="orders.{fmt}"'
+        return response
+
+
 class CancelOrderItemView(APIView):
     permission_classes = [IsAuthenticated]
 
+    @idempotent
     @transaction.atomic
     def post(self, request, order_item_id):
         if request.user.role != 'CUSTOMER':
@@ -173,6 +336,7 @@ class CancelOrderItemView(APIView):
 
         item.status = 'CANCELLED'
         item.save()
+        rollup_order_status([item.order_id])
 
         return Response({"message": "Order cancelled successfully"})
 
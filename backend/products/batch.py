@@ -0,0 +1,74 @@
+from django.db import transaction
+
+from . import cache, facets
+from .models import Product
+from .serializers import ProductStockPriceSerializer
+
+MAX_BATCH_SIZE = 5000
+
+
+@transaction.atomic
+def apply_stock_price_updates(seller, items):
+    """
+    Apply ``{id, price, stock_quantity | stock_delta}`` entries to the
+    seller's products in one transaction. Rows are locked once in id
+    order and written back with a single bulk_update; returns
+    ``(updated_count, results)`` with one compact result per entry.
+    """
+    results = []
+    valid = {}
+    for item in items:
+        serializer = ProductStockPriceSerializer(data=item)
+        if serializer.is_valid():
+            # Later entries for the same product win
+            valid[serializer.validated_data['id']] = serializer.validated_data
+        else:
+            results.append({
+                'id': item.get('id') if isinstance(item, dict) else None,
+                'status': 'invalid',
+                'errors': serializer.errors,
+            })
+
+    products = {
+        p.pk: p
+        for p in Product.objects.select_for_update()
+        .filter(seller=seller, pk__in=list(valid))
+        .order_by('pk')
+        .only('id', 'price', 'stock_quantity', 'is_active', 'seller_verified')
+    }
+    old_rows = {
+        row['id']: row
+        for row in Product.objects.filter(pk__in=list(products))
+        .values('id', *facets.SNAPSHOT_FIELDS)
+    }
+
+    changed = []
+    new_rows = []
+    for pk, data in valid.items():
+        product = products.get(pk)
+        if product is None:
+            results.append({'id': pk, 'status': 'not_found'})
+            continue
+
+        stock = product.stock_quantity
+        if 'stock_quantity' in data:
+            stock = data['stock_quantity']
+        elif 'stock_delta' in data:
+            stock += data['stock_delta']
+        if stock < 0:
+            results.append({'id': pk, 'status': 'insufficient_stock', 'stock_quantity': product.stock_quantity})
+            continue
+
+        product.stock_quantity = stock
+        product.price = data.get('price', product.price)
+        product.refresh_listable()
+        changed.append(product)
+        new_rows.append({**old_rows[pk], 'price': product.price, 'stock_quantity': stock})
+        results.append({'id': pk, 'status': 'ok', 'price': product.price, 'stock_quantity': stock})
+
+    Product.objects.bulk_update(changed, ['price', 'stock_quantity', 'is_listable'], batch_size=1000)
+    facets.record_change([old_rows[p.pk] for p in changed], new_rows)
+    if changed:
+        cache.bump_version()
+
+    return len(changed), results
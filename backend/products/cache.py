@@ -0,0 +1,134 @@
+import hashlib
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import OuterRef, Subquery
+from django.utils import timezone
+from rest_framework.response import Response
+
+VERSION_KEY = 'catalog:version'
+MODIFIED_KEY = 'catalog:modified'
+
+
+def get_version():
+    version = cache.get(VERSION_KEY)
+    if version is None:
+        # Seed from the clock so an evicted counter never restarts at a
+        # number that older cache entries were stored under.
+        cache.add(VERSION_KEY, int(time.time() * 1000), timeout=None)
+        version = cache.get(VERSION_KEY)
+    return version
+
+
+def _bump():
+    try:
+        cache.incr(VERSION_KEY)
+    except ValueError:
+        get_version()
+    cache.set(MODIFIED_KEY, timezone.now(), timeout=None)
+
+
+def bump_version():
+    """
+    Invalidate every cached catalog page. Runs after the surrounding
+    transaction commits so a concurrent read can't re-cache the old rows
+    under the new version.
+    """
+    transaction.on_commit(_bump)
+
+
+def cache_key(request, version=None):
+    params = sorted(
+        (key, value)
+        for key in request.query_params
+        for value in request.query_params.getlist(key)
+    )
+    raw = f"{request.get_host()}|{request.path}|{params}"
+    digest = hashlib.md5(raw.encode()).hexdigest()
+    return f"catalog:{version or get_version()}:{digest}"
+
+
+def product_snapshot(product_id):
+    """
+    ``{id, price, stock_quantity, available, is_active}`` of a product (or
+    None), cached under the current catalog version so it can't outlive a
+    write. ``available`` is the stock not under an active hold.
+    """
+    key = f"catalog:{get_version()}:product:{product_id}"
+    snapshot = cache.get(key)
+    if snapshot is None:
+        from .holds import available_units
+        from .models import Product
+
+        snapshot = (
+            Product.objects.filter(pk=product_id)
+            .annotate(available=available_units())
+            .values('id', 'price', 'stock_quantity', 'available', 'is_active')
+            .first()
+        ) or {}
+        cache.set(key, snapshot, settings.CATALOG_CACHE_TIMEOUT)
+    return snapshot or None
+
+
+def product_summaries(product_ids):
+    """
+    ``{id: summary}`` for cart / checkout displays. Read from the cache in
+    one round trip; misses are loaded with a single query and cached
+    under the current catalog version.
+    """
+    from .holds import available_units
+    from .models import Product, ProductImage
+
+    version = get_version()
+    keys = {f"catalog:{version}:summary:{pk}": int(pk) for pk in product_ids}
+    found = {keys[key]: value for key, value in cache.get_many(list(keys)).items()}
+
+    missing = [pk for pk in keys.values() if pk not in found]
+    if missing:
+        first_thumbnail = (
+            ProductImage.objects.filter(product=OuterRef('pk'))
+            .order_by('id')
+            .values('thumbnail_url')[:1]
+        )
+        rows = (
+            Product.objects.filter(pk__in=missing)
+            .annotate(thumbnail_url=Subquery(first_thumbnail), available=available_units())
+            .values('id', 'title', 'price', 'stock_quantity', 'available', 'is_active', 'thumbnail_url')
+        )
+        fetched = {row['id']: row for row in rows}
+        cache.set_many(
+            {f"catalog:{version}:summary:{pk}": row for pk, row in fetched.items()},
+            settings.CATALOG_CACHE_TIMEOUT,
+        )
+        found.update(fetched)
+    return found
+
+
+def cached_response(request, build):
+    """Serve ``build()``'s response data from the cache for this query."""
+    key = cache_key(request)
+    data = cache.get(key)
+    if data is not None:
+        return Response(data)
+
+    response = build()
+    if response.status_code == 200:
+        cache.set(key, response.data, settings.CATALOG_CACHE_TIMEOUT)
+    return response
+
+
+# Conditional GET: both derive from the version counter, so a 304 costs
+# a cache read and no database query.
+
+def etag(request, *args, **kwargs):
+    return cache_key(request)
+
+
+def last_modified(request, *args, **kwargs):
+    modified = cache.get(MODIFIED_KEY)
+    if modified is None:
+        modified = timezone.now()
+        cache.add(MODIFIED_KEY, modified, timeout=None)
+    return modified
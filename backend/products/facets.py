@@ -0,0 +1,194 @@
+from collections import defaultdict
+from decimal import Decimal
+
+from django.db import IntegrityError, transaction
+from django.db.models import F
+from django.db.models.functions import Greatest
+
+from .models import CatalogFacet, Category, Product
+
+# (lower bound inclusive, upper bound exclusive); None = unbounded
+PRICE_BUCKETS = [
+    (Decimal('0'), Decimal('500')),
+    (Decimal('500'), Decimal('1000')),
+    (Decimal('1000'), Decimal('5000')),
+    (Decimal('5000'), Decimal('10000')),
+    (Decimal('10000'), None),
+]
+
+SNAPSHOT_FIELDS = (
+    'brand', 'category_id', 'price', 'stock_quantity', 'is_active', 'seller_verified'
+)
+
+
+def bucket_label(low, high):
+    return f"{low}+" if high is None else f"{low}-{high}"
+
+
+def price_bucket(price):
+    for low, high in PRICE_BUCKETS:
+        if price >= low and (high is None or price < high):
+            return bucket_label(low, high)
+    return None
+
+
+def snapshot(product_id):
+    """Current facet-relevant state of a product row, or None."""
+    return (
+        Product.objects.filter(pk=product_id)
+        .values(*SNAPSHOT_FIELDS)
+        .first()
+    )
+
+
+def contribution(row, sign=1):
+    """Mapping of (facet, value) -> [products, in_stock] for one snapshot."""
+    delta = defaultdict(lambda: [0, 0])
+    if not row or not row['is_active'] or not row['seller_verified']:
+        return delta
+
+    in_stock = 1 if row['stock_quantity'] > 0 else 0
+    keys = [(CatalogFacet.CATEGORY, str(row['category_id']))]
+    if row['brand']:
+        keys.append((CatalogFacet.BRAND, row['brand']))
+    bucket = price_bucket(row['price'])
+    if bucket:
+        keys.append((CatalogFacet.PRICE, bucket))
+
+    for key in keys:
+        delta[key][0] += sign
+        delta[key][1] += sign * in_stock
+    return delta
+
+
+def diff(old_rows, new_rows):
+    delta = defaultdict(lambda: [0, 0])
+    for rows, sign in ((old_rows, -1), (new_rows, 1)):
+        for row in rows:
+            for key, (products, in_stock) in contribution(row, sign).items():
+                delta[key][0] += products
+                delta[key][1] += in_stock
+    return delta
+
+
+def increment(facet, value, products, in_stock):
+    # Counts never go below zero, even if the table has drifted from the
+    # catalog; rebuild_catalog_facets brings it back in line
+    return CatalogFacet.objects.filter(facet=facet, value=value).update(
+        product_count=Greatest(F('product_count') + products, 0),
+        in_stock_count=Greatest(F('in_stock_count') + in_stock, 0),
+    )
+
+
+def apply_delta(delta):
+    # Fixed row order so concurrent writers (e.g. two checkouts) lock the
+    # shared facet rows in the same sequence and can't deadlock
+    for (facet, value), (products, in_stock) in sorted(delta.items()):
+        if not products and not in_stock:
+            continue
+        if increment(facet, value, products, in_stock):
+            continue
+        if products <= 0 and in_stock <= 0:
+            # Nothing to remove from a row that doesn't exist
+            continue
+
+        try:
+            with transaction.atomic():
+                CatalogFacet.objects.create(
+                    facet=facet,
+                    value=value,
+                    product_count=max(products, 0),
+                    in_stock_count=max(in_stock, 0),
+                )
+        except IntegrityError:
+            # Created concurrently - fall back to the increment
+            increment(facet, value, products, in_stock)
+
+
+def record_change(old_rows, new_rows):
+    apply_delta(diff(old_rows, new_rows))
+
+
+def seller_verification_changed(seller_ids, is_verified):
+    """Add or remove every active product of the given sellers."""
+    rows = (
+        Product.objects.filter(seller_id__in=seller_ids, is_active=True)
+        .values(*SNAPSHOT_FIELDS)
+    )
+    delta = defaultdict(lambda: [0, 0])
+    sign = 1 if is_verified else -1
+    for row in rows.iterator():
+        # Count the row as verified; the sign decides add vs remove
+        row['seller_verified'] = True
+        for key, (products, in_stock) in contribution(row, sign).items():
+            delta[key][0] += products
+            delta[key][1] += in_stock
+    apply_delta(delta)
+
+
+@transaction.atomic
+def rebuild():
+    delta = defaultdict(lambda: [0, 0])
+    rows = Product.objects.filter(is_active=True, seller_verified=True).values(*SNAPSHOT_FIELDS)
+    for row in rows.iterator():
+        for key, (products, in_stock) in contribution(row).items():
+            delta[key][0] += products
+            delta[key][1] += in_stock
+
+    CatalogFacet.objects.all().delete()
+    CatalogFacet.objects.bulk_create([
+        CatalogFacet(facet=facet, value=value, product_count=products, in_stock_count=in_stock)
+        for (facet, value), (products, in_stock) in delta.items()
+        if products
+    ])
+
+
+def facet_counts(in_stock=True):
+    count_field = 'in_stock_count' if in_stock else 'product_count'
+    counts = {CatalogFacet.BRAND: {}, CatalogFacet.CATEGORY: {}, CatalogFacet.PRICE: {}}
+    for facet, value, count in CatalogFacet.objects.filter(
+        **{f'{count_field}__gt': 0}
+    ).values_list('facet', 'value', count_field):
+        counts[facet][value] = count
+
+    brands = [
+        {"value": value, "count": count}
+        for value, count in sorted(counts[CatalogFacet.BRAND].items(), key=lambda kv: (-kv[1], kv[0]))
+    ]
+
+    prices = []
+    for low, high in PRICE_BUCKETS:
+        label = bucket_label(low, high)
+        prices.append({
+            "value": label,
+            "min": low,
+            "max": high,
+            "count": counts[CatalogFacet.PRICE].get(label, 0),
+        })
+
+    # Direct counts roll up into every ancestor on the materialized path
+    # so a parent category reports the products of its whole subtree.
+    categories = {}
+    paths = {}
+    for pk, name, parent_id, path in Category.objects.filter(is_active=True).values_list(
+        'id', 'name', 'parent_id', 'path'
+    ):
+        categories[pk] = {"id": pk, "name": name, "parent": parent_id, "count": 0}
+        paths[pk] = path
+    for value, count in counts[CatalogFacet.CATEGORY].items():
+        path = paths.get(int(value))
+        if not path:
+            continue
+        for ancestor_id in path.strip('/').split('/'):
+            node = categories.get(int(ancestor_id))
+            if node:
+                node["count"] += count
+
+    # Precomputed over the whole browsable catalog: the counts are not
+    # narrowed by the request's q / category / brand / price filters
+    return {
+        "scope": "catalog",
+        "brand": brands,
+        "category": [c for c in categories.values() if c["count"]],
+        "price": prices,
+    }
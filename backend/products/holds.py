@@ -0,0 +1,189 @@
+"""
+Inventory reservations.
+
+A StockHold sets units aside for one customer for ``settings.STOCK_HOLD_TTL``
+seconds. ``Product.stock_quantity`` stays the physical stock; what another
+customer can still buy is the stock minus the active (unexpired) holds,
+checked under the product row lock by ``reserve`` and by checkout. A
+hold is turned into a sale by checkout without that check: its units are
+already set aside, so the product row is only written, not validated.
+Expired holds simply stop counting; ``expire_holds`` deletes their rows.
+"""
+from datetime import timedelta
+from functools import reduce
+from operator import or_
+
+from django.conf import settings
+from django.db import connection, transaction
+from django.db.models import Case, F, OuterRef, Q, Subquery, Sum, When
+from django.db.models.functions import Coalesce, Greatest
+from django.utils import timezone
+
+from . import cache, facets
+from .models import Product, StockHold
+
+
+class HoldError(Exception):
+    def __init__(self, errors):
+        super().__init__(errors)
+        self.errors = errors
+
+
+def active_holds():
+    return StockHold.objects.filter(expires_at__gt=timezone.now())
+
+
+def held_units(exclude_customer=None):
+    """
+    Expression for the units of each product (``OuterRef('pk')``) under
+    active holds, optionally leaving out one customer's own holds.
+    """
+    holds = active_holds().filter(product=OuterRef('pk'))
+    if exclude_customer is not None:
+        holds = holds.exclude(customer=exclude_customer)
+    total = holds.values('product').annotate(total=Sum('quantity')).values('total')
+    return Coalesce(Subquery(total), 0)
+
+
+def available_units(exclude_customer=None):
+    """
+    Expression for the stock of each product not under an active hold
+    (other than ``exclude_customer``'s, whose held units are theirs to buy).
+    """
+    return Greatest(F('stock_quantity') - held_units(exclude_customer), 0)
+
+
+def held_by(customer):
+    """``{product_id: quantity}`` of the customer's active holds."""
+    return dict(active_holds().filter(customer=customer).values_list('product_id', 'quantity'))
+
+
+def change_stock(deltas, guarded=True):
+    """
+    Add ``{product_id: delta}`` to stock in one UPDATE. Decrements are only
+    applied to active products that still have the units; returns the
+    number of rows changed.
+    """
+    conditions = (
+        Q(pk=pk, is_active=True, stock_quantity__gte=-delta) if guarded and delta < 0 else Q(pk=pk)
+        for pk, delta in deltas.items()
+    )
+    return Product.objects.filter(reduce(or_, conditions)).update(
+        stock_quantity=Case(
+            *(When(pk=pk, then=F('stock_quantity') + delta) for pk, delta in deltas.items()),
+            default=F('stock_quantity'),
+        )
+    )
+
+
+def stock_changed(deltas):
+    """Keep is_listable, facets and the catalog cache in step with ``change_stock``."""
+    products = Product.objects.filter(pk__in=list(deltas))
+    products.refresh_listable()
+    new_rows = list(products.values('id', *facets.SNAPSHOT_FIELDS))
+    old_rows = [{**row, 'stock_quantity': row['stock_quantity'] - deltas[row['id']]} for row in new_rows]
+    facets.record_change(old_rows, new_rows)
+    cache.bump_version()
+
+
+@transaction.atomic
+def reserve(customer, lines):
+    """
+    Hold ``{product_id: quantity}`` for ``customer``, replacing any earlier
+    hold on the same products and restarting the clock. The products are
+    locked in id order while availability is checked. All or nothing:
+    raises HoldError listing the lines that can't be held.
+    """
+    products = {
+        row['id']: row
+        for row in Product.objects.select_for_update()
+        .filter(pk__in=list(lines))
+        .order_by('id')
+        .annotate(held=held_units(exclude_customer=customer))
+        .values('id', 'stock_quantity', 'is_active', 'held')
+    }
+
+    errors = []
+    for pk, quantity in lines.items():
+        product = products.get(pk)
+        if product is None or not product['is_active']:
+            errors.append({'product_id': pk, 'error': 'Product not available'})
+            continue
+        available = product['stock_quantity'] - product['held']
+        if available < quantity:
+            errors.append({'product_id': pk, 'error': 'Insufficient stock', 'available': max(available, 0)})
+    if errors:
+        raise HoldError(errors)
+
+    expires_at = timezone.now() + timedelta(seconds=settings.STOCK_HOLD_TTL)
+    kwargs = {}
+    if connection.features.supports_update_conflicts_with_target:
+        kwargs['unique_fields'] = ['customer', 'product']
+    StockHold.objects.bulk_create(
+        [
+            StockHold(customer=customer, product_id=pk, quantity=quantity, expires_at=expires_at)
+            for pk, quantity in lines.items()
+        ],
+        update_conflicts=True,
+        update_fields=['quantity', 'expires_at'],
+        **kwargs
+    )
+    # Cached snapshots carry the available units
+    cache.bump_version()
+    return expires_at
+
+
+def consume(customer, lines):
+    """
+    Use up the customer's active holds for ``{product_id: quantity}``
+    (call inside the checkout transaction, which then takes the units out
+    of stock). Only hold rows are locked here; returns
+    ``{product_id: quantity covered by a hold}``.
+    """
+    holds = list(
+        active_holds().select_for_update()
+        .filter(customer=customer, product_id__in=list(lines))
+        .order_by('product_id')
+    )
+
+    covered = {}
+    used_up = []
+    remaining = []
+    for hold in holds:
+        covered[hold.product_id] = min(hold.quantity, lines[hold.product_id])
+        hold.quantity -= covered[hold.product_id]
+        (remaining if hold.quantity else used_up).append(hold)
+
+    if used_up:
+        StockHold.objects.filter(pk__in=[hold.pk for hold in used_up]).delete()
+    if remaining:
+        StockHold.objects.bulk_update(remaining, ['quantity'])
+    return covered
+
+
+def release(customer):
+    """Drop the customer's holds; returns how many there were."""
+    deleted, _ = StockHold.objects.filter(customer=customer).delete()
+    if deleted:
+        cache.bump_version()
+    return deleted
+
+
+def expire_holds(chunk_size=500):
+    """
+    Delete expired holds (they no longer count against stock), one short
+    transaction per chunk. Holds locked by a checkout in progress are
+    skipped. Yields the number deleted per chunk.
+    """
+    while True:
+        with transaction.atomic():
+            expired = StockHold.objects.filter(expires_at__lte=timezone.now()).order_by('expires_at', 'id')
+            if connection.features.has_select_for_update_skip_locked:
+                expired = expired.select_for_update(skip_locked=True)
+            ids = list(expired.values_list('id', flat=True)[:chunk_size])
+            deleted = StockHold.objects.filter(pk__in=ids).delete()[0] if ids else 0
+            if deleted:
+                cache.bump_version()
+        if not deleted:
+            return
+        yield deleted
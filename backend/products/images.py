@@ -0,0 +1,132 @@
+import hashlib
+import logging
+import os
+import tempfile
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.db import close_old_connections, transaction
+
+from .models import ProductImage
+
+try:
+    from PIL import Image
+except ImportError:  # Pillow is optional; without it originals are served as-is
+    Image = None
+
+logger = logging.getLogger(__name__)
+
+ALLOWED_EXTENSIONS = {'.jpg', '.jpeg', '.png', '.gif', '.webp'}
+
+# name -> bounding box; aspect ratio is preserved
+VARIANTS = {
+    'thumbnail': (200, 200),
+    'listing': (600, 600),
+}
+
+_executor = None
+
+
+def get_executor():
+    global _executor
+    if _executor is None:
+        _executor = ThreadPoolExecutor(
+            max_workers=settings.PRODUCT_IMAGE_WORKERS,
+            thread_name_prefix='product-images',
+        )
+    return _executor
+
+
+def relative_path(content_hash, suffix):
+    return os.path.join('products', content_hash[:2], content_hash[2:4], f"{content_hash}{suffix}")
+
+
+def media_url(path):
+    return settings.MEDIA_URL + path.replace(os.sep, '/')
+
+
+def store_upload(upload):
+    """
+    Stream an uploaded file to content-addressed storage under MEDIA_ROOT.
+    Returns ``(content_hash, relative_path)``; a file that is already
+    stored is not written twice.
+    """
+    extension = os.path.splitext(upload.name)[1].lower()
+    tmp_dir = os.path.join(settings.MEDIA_ROOT, 'tmp')
+    os.makedirs(tmp_dir, exist_ok=True)
+
+    hasher = hashlib.sha256()
+    with tempfile.NamedTemporaryFile(dir=tmp_dir, delete=False) as tmp:
+        for chunk in upload.chunks():
+            hasher.update(chunk)
+            tmp.write(chunk)
+
+    content_hash = hasher.hexdigest()
+    path = relative_path(content_hash, extension)
+    destination = os.path.join(settings.MEDIA_ROOT, path)
+    if os.path.exists(destination):
+        os.remove(tmp.name)
+    else:
+        os.makedirs(os.path.dirname(destination), exist_ok=True)
+        os.replace(tmp.name, destination)
+    return content_hash, path
+
+
+def create_variants(content_hash, original_path):
+    """Write every missing variant of a stored original; returns name -> relative path."""
+    variants = {}
+    for name, size in VARIANTS.items():
+        path = relative_path(content_hash, f"_{name}.jpg")
+        destination = os.path.join(settings.MEDIA_ROOT, path)
+        if not os.path.exists(destination):
+            with Image.open(os.path.join(settings.MEDIA_ROOT, original_path)) as img:
+                img = img.convert('RGB')
+                img.thumbnail(size)
+                img.save(destination, 'JPEG', quality=85, optimize=True)
+        variants[name] = path
+    return variants
+
+
+def process_image(image_id, original_path):
+    try:
+        image = ProductImage.objects.get(pk=image_id)
+
+        if Image is None:
+            logger.warning("Pillow not installed; serving original for image %s", image_id)
+            image.thumbnail_url = image.listing_url = image.image_url
+        else:
+            variants = create_variants(image.content_hash, original_path)
+            image.thumbnail_url = media_url(variants['thumbnail'])
+            image.listing_url = media_url(variants['listing'])
+        image.status = ProductImage.READY
+        image.save(update_fields=['thumbnail_url', 'listing_url', 'status'])
+    except ProductImage.DoesNotExist:
+        pass
+    except Exception:
+        logger.exception("Failed to process product image %s", image_id)
+        ProductImage.objects.filter(pk=image_id).update(status=ProductImage.FAILED)
+    finally:
+        close_old_connections()
+
+
+def add_product_image(product, upload):
+    """Store an upload and queue its variants; returns the PENDING ProductImage."""
+    content_hash, path = store_upload(upload)
+
+    # Same file processed before: reuse its variants, nothing to resize
+    done = (
+        ProductImage.objects.filter(content_hash=content_hash, status=ProductImage.READY)
+        .exclude(thumbnail_url='')
+        .first()
+    )
+    image = ProductImage.objects.create(
+        product=product,
+        image_url=media_url(path),
+        content_hash=content_hash,
+        thumbnail_url=done.thumbnail_url if done else '',
+        listing_url=done.listing_url if done else '',
+        status=ProductImage.READY if done else ProductImage.PENDING,
+    )
+    if not done:
+        transaction.on_commit(lambda: get_executor().submit(process_image, image.pk, path))
+    return image
@@ -0,0 +1,174 @@
+import codecs
+import csv
+import json
+
+from django.db import transaction
+
+from . import cache, facets
+from .models import Category, Product
+from .search import index_products
+from .serializers import ProductImportSerializer
+
+FORMATS = ('csv', 'jsonl')
+UPDATE_FIELDS = ['title', 'description', 'price', 'stock_quantity', 'brand', 'category_id', 'is_listable']
+
+
+def detect_format(filename, requested=None):
+    if requested:
+        return requested.lower()
+    name = (filename or '').lower()
+    if name.endswith('.jsonl') or name.endswith('.ndjson'):
+        return 'jsonl'
+    return 'csv'
+
+
+class ImportFileError(Exception):
+    """The file itself can't be read any further (bad encoding, broken CSV)."""
+
+
+def read_rows(fileobj, fmt):
+    """
+    Yield ``(row_number, dict)`` one row at a time from a binary file.
+    Raises ImportFileError at the first row that can't be decoded.
+    """
+    lines = codecs.iterdecode(fileobj, 'utf-8-sig')
+    number = 0
+    try:
+        if fmt == 'csv':
+            for number, row in enumerate(csv.DictReader(lines), start=1):
+                yield number, row
+            return
+
+        for line in lines:
+            if not line.strip():
+                continue
+            number += 1
+            try:
+                row = json.loads(line)
+            except ValueError:
+                row = None
+            yield number, row if isinstance(row, dict) else {'__invalid__': line}
+    except UnicodeDecodeError:
+        raise ImportFileError(f"Row {number + 1}: file is not valid UTF-8")
+    except csv.Error as e:
+        raise ImportFileError(f"Row {number + 1}: {e}")
+
+
+class ProductImporter:
+    """
+    Upsert a seller's products by SKU from a stream of rows.
+
+    Rows are validated one at a time and written in ``batch_size`` chunks
+    with bulk_create / bulk_update, so memory depends on the batch size
+    and not on the size of the upload.
+    """
+    batch_size = 500
+    max_errors = 1000
+
+    def __init__(self, seller, batch_size=None):
+        self.seller = seller
+        if batch_size:
+            self.batch_size = batch_size
+        self.category_ids = set(Category.objects.values_list('id', flat=True))
+        self.created = 0
+        self.updated = 0
+        self.failed = 0
+        self.errors = []
+        self.error = None
+
+    def add_error(self, number, errors):
+        self.failed += 1
+        if len(self.errors) < self.max_errors:
+            self.errors.append({'row': number, 'errors': errors})
+
+    def run(self, rows):
+        batch = {}
+        try:
+            for number, row in rows:
+                if '__invalid__' in row:
+                    self.add_error(number, {'non_field_errors': ['Invalid JSON object']})
+                    continue
+
+                serializer = ProductImportSerializer(
+                    data=row, context={'category_ids': self.category_ids}
+                )
+                if not serializer.is_valid():
+                    self.add_error(number, serializer.errors)
+                    continue
+
+                # A SKU repeated within a batch: the last row wins
+                batch[serializer.validated_data['sku']] = serializer.validated_data
+                if len(batch) >= self.batch_size:
+                    self.flush(batch)
+                    batch = {}
+        except ImportFileError as e:
+            # Rows before the unreadable one are still imported
+            self.error = str(e)
+
+        if batch:
+            self.flush(batch)
+
+        cache.bump_version()
+        return self.summary()
+
+    @transaction.atomic
+    def flush(self, batch):
+        skus = list(batch)
+        existing = {
+            p.sku: p
+            for p in Product.objects.select_for_update().filter(seller=self.seller, sku__in=skus)
+        }
+        old_rows = list(
+            Product.objects.filter(pk__in=[p.pk for p in existing.values()])
+            .values(*facets.SNAPSHOT_FIELDS)
+        )
+
+        to_create = []
+        to_update = []
+        for sku, data in batch.items():
+            product = existing.get(sku)
+            if product is None:
+                product = Product(
+                    seller=self.seller,
+                    sku=sku,
+                    is_active=True,
+                    seller_verified=self.seller.is_verified,
+                )
+                to_create.append(product)
+            else:
+                to_update.append(product)
+
+            product.title = data['title']
+            product.description = data['description']
+            product.price = data['price']
+            product.stock_quantity = data['stock_quantity']
+            product.brand = data.get('brand', '')
+            product.category_id = data['category']
+            product.refresh_listable()
+
+        Product.objects.bulk_create(to_create)
+        Product.objects.bulk_update(to_update, UPDATE_FIELDS)
+
+        # bulk_create doesn't return ids on every backend (MySQL); reload
+        # the batch once to index it and update the facet counts.
+        saved = list(
+            Product.objects.filter(seller=self.seller, sku__in=skus)
+            .only('id', 'title', 'description', 'brand')
+        )
+        index_products(saved)
+        facets.record_change(
+            old_rows,
+            Product.objects.filter(pk__in=[p.pk for p in saved]).values(*facets.SNAPSHOT_FIELDS),
+        )
+
+        self.created += len(to_create)
+        self.updated += len(to_update)
+
+    def summary(self):
+        return {
+            'created': self.created,
+            'updated': self.updated,
+            'failed': self.failed,
+            'errors': self.errors,
+            'error': self.error,
+        }
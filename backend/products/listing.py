@@ -0,0 +1,15 @@
+from . import cache, facets
+from .models import Product
+
+
+def seller_verification_changed(seller_ids, is_verified):
+    """
+    Propagate a change of SellerProfile.is_verified to everything derived
+    from it: the denormalized product columns, facet counts and the
+    catalog cache. Call it for bulk updates that bypass model signals.
+    """
+    if not seller_ids:
+        return
+    Product.objects.set_seller_verified(seller_ids, is_verified)
+    facets.seller_verification_changed(seller_ids, is_verified)
+    cache.bump_version()
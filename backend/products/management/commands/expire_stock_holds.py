@@ -0,0 +1,19 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from products.holds import expire_holds
+
+
+class Command(BaseCommand):
+    help = "Delete expired checkout holds; run every few minutes"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--chunk-size', type=int, default=500)
+
+    def handle(self, *args, **options):
+        started = time.monotonic()
+        deleted = sum(expire_holds(chunk_size=options['chunk_size']))
+        self.stdout.write(self.style.SUCCESS(
+            f"Deleted {deleted} expired holds in {time.monotonic() - started:.2f}s"
+        ))
@@ -0,0 +1,33 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from accounts.models import SellerProfile
+from products.importer import FORMATS, ProductImporter, detect_format, read_rows
+
+
+class Command(BaseCommand):
+    help = "Stream a CSV / JSONL product file into a seller's catalog, upserting by SKU"
+
+    def add_arguments(self, parser):
+        parser.add_argument('seller_id', type=int)
+        parser.add_argument('path')
+        parser.add_argument('--format', choices=FORMATS)
+        parser.add_argument('--batch-size', type=int)
+
+    def handle(self, *args, **options):
+        try:
+            seller = SellerProfile.objects.get(pk=options['seller_id'])
+        except SellerProfile.DoesNotExist:
+            raise CommandError("Seller not found")
+
+        fmt = detect_format(options['path'], options['format'])
+        importer = ProductImporter(seller, batch_size=options['batch_size'])
+        with open(options['path'], 'rb') as fileobj:
+            result = importer.run(read_rows(fileobj, fmt))
+
+        for error in result['errors']:
+            self.stderr.write(f"Row {error['row']}: {error['errors']}")
+        self.stdout.write(self.style.SUCCESS(
+            f"Created {result['created']}, updated {result['updated']}, failed {result['failed']}"
+        ))
+        if result['error']:
+            raise CommandError(result['error'])
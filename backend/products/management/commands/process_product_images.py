@@ -0,0 +1,25 @@
+from django.core.management.base import BaseCommand
+
+from products.images import process_image, relative_path
+from products.models import ProductImage
+
+
+class Command(BaseCommand):
+    help = "Generate missing variants for uploaded images left PENDING or FAILED (e.g. after a restart)"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--retry-failed', action='store_true')
+
+    def handle(self, *args, **options):
+        statuses = [ProductImage.PENDING]
+        if options['retry_failed']:
+            statuses.append(ProductImage.FAILED)
+
+        images = ProductImage.objects.filter(status__in=statuses).exclude(content_hash='')
+        count = 0
+        for image in images.iterator():
+            extension = image.image_url.rsplit('.', 1)[-1].lower()
+            process_image(image.pk, relative_path(image.content_hash, f".{extension}"))
+            count += 1
+
+        self.stdout.write(self.style.SUCCESS(f"Processed {count} images"))
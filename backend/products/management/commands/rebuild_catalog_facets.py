@@ -0,0 +1,14 @@
+from django.core.management.base import BaseCommand
+
+from products import facets
+from products.models import CatalogFacet
+
+
+class Command(BaseCommand):
+    help = "Recompute the browse facet counts from the product table"
+
+    def handle(self, *args, **options):
+        facets.rebuild()
+        self.stdout.write(self.style.SUCCESS(
+            f"Rebuilt {CatalogFacet.objects.count()} facet rows"
+        ))
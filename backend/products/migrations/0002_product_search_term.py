@@ -0,0 +1,64 @@
+# Generated by Django 5.2.18 on 2026-10-17 05:49
+
+import re
+import unicodedata
+from collections import Counter
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+# Frozen copy of products.search as of this migration
+TOKEN_RE = re.compile(r"\w+")
+FIELD_WEIGHTS = {"title": 3, "brand": 2, "description": 1}
+TERM_MAX_LENGTH = 64
+
+
+def normalize(text):
+    decomposed = unicodedata.normalize("NFKD", (text or "").casefold())
+    return "".join(c for c in decomposed if not unicodedata.combining(c))
+
+
+def build_terms(product):
+    weights = Counter()
+    for field, weight in FIELD_WEIGHTS.items():
+        for token in TOKEN_RE.findall(normalize(getattr(product, field))):
+            if len(token) > 1 or not token.isascii():
+                weights[token[:TERM_MAX_LENGTH]] += weight
+    return weights.items()
+
+
+def build_search_index(apps, schema_editor):
+    Product = apps.get_model('products', 'Product')
+    ProductSearchTerm = apps.get_model('products', 'ProductSearchTerm')
+
+    rows = []
+    for product in Product.objects.only('id', 'title', 'description', 'brand').iterator():
+        for term, weight in build_terms(product):
+            rows.append(ProductSearchTerm(product_id=product.pk, term=term, weight=weight))
+        if len(rows) >= 1000:
+            ProductSearchTerm.objects.bulk_create(rows)
+            rows = []
+    ProductSearchTerm.objects.bulk_create(rows)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('products', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ProductSearchTerm',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('term', models.CharField(max_length=64)),
+                ('weight', models.PositiveIntegerField(default=1)),
+                ('product', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='search_terms', to='products.product')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['term', 'product'], name='product_search_term_idx')],
+            },
+        ),
+        migrations.RunPython(build_search_index, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,43 @@
+# Generated by Django 5.2.18 on 2026-10-17 05:55
+
+from django.db import migrations, models
+from django.db.models import ExpressionWrapper, Q
+
+
+def populate_listing(apps, schema_editor):
+    Product = apps.get_model('products', 'Product')
+    Product.objects.filter(seller__is_verified=True).update(seller_verified=True)
+    Product.objects.update(is_listable=ExpressionWrapper(
+        Q(is_active=True, seller_verified=True, stock_quantity__gt=0),
+        output_field=models.BooleanField()
+    ))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounts', '0005_keyset_indexes'),
+        ('products', '0007_product_image_variants'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='product',
+            name='is_listable',
+            field=models.BooleanField(default=False, editable=False),
+        ),
+        migrations.AddField(
+            model_name='product',
+            name='seller_verified',
+            field=models.BooleanField(default=False, editable=False),
+        ),
+        migrations.AddIndex(
+            model_name='product',
+            index=models.Index(fields=['is_listable', 'created_at', 'id'], name='product_listable_recent_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='product',
+            index=models.Index(fields=['is_listable', 'price', 'id'], name='product_listable_price_idx'),
+        ),
+        migrations.RunPython(populate_listing, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,62 @@
+from collections import defaultdict
+from decimal import Decimal
+
+from django.db import migrations
+
+# Frozen copy of products.facets.rebuild as of this migration
+PRICE_BUCKETS = [
+    (Decimal('0'), Decimal('500')),
+    (Decimal('500'), Decimal('1000')),
+    (Decimal('1000'), Decimal('5000')),
+    (Decimal('5000'), Decimal('10000')),
+    (Decimal('10000'), None),
+]
+
+
+def price_bucket(price):
+    for low, high in PRICE_BUCKETS:
+        if price >= low and (high is None or price < high):
+            return f"{low}+" if high is None else f"{low}-{high}"
+    return None
+
+
+def rebuild_catalog_facets(apps, schema_editor):
+    Product = apps.get_model('products', 'Product')
+    CatalogFacet = apps.get_model('products', 'CatalogFacet')
+
+    counts = defaultdict(lambda: [0, 0])
+    rows = Product.objects.filter(is_active=True, seller_verified=True).values(
+        'brand', 'category_id', 'price', 'stock_quantity'
+    )
+    for row in rows.iterator():
+        in_stock = 1 if row['stock_quantity'] > 0 else 0
+        keys = [('CATEGORY', str(row['category_id']))]
+        if row['brand']:
+            keys.append(('BRAND', row['brand']))
+        bucket = price_bucket(row['price'])
+        if bucket:
+            keys.append(('PRICE', bucket))
+        for key in keys:
+            counts[key][0] += 1
+            counts[key][1] += in_stock
+
+    CatalogFacet.objects.all().delete()
+    CatalogFacet.objects.bulk_create(
+        [
+            CatalogFacet(facet=facet, value=value, product_count=products, in_stock_count=in_stock)
+            for (facet, value), (products, in_stock) in counts.items()
+        ],
+        batch_size=1000,
+    )
+
+
+class Migration(migrations.Migration):
+
+    # Counts depend on seller_verified, filled in by 0008_listable_projection
+    dependencies = [
+        ('products', '0010_stock_hold'),
+    ]
+
+    operations = [
+        migrations.RunPython(rebuild_catalog_facets, migrations.RunPython.noop),
+    ]
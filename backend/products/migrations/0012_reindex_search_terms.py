@@ -0,0 +1,52 @@
+import re
+import unicodedata
+from collections import Counter
+
+from django.db import migrations
+
+# Frozen copy of products.search as of this migration: Unicode tokens,
+# case- and accent-folded. Terms written by the ASCII-only tokenizer of
+# earlier releases are replaced.
+TOKEN_RE = re.compile(r"\w+")
+FIELD_WEIGHTS = {"title": 3, "brand": 2, "description": 1}
+TERM_MAX_LENGTH = 64
+
+
+def normalize(text):
+    decomposed = unicodedata.normalize("NFKD", (text or "").casefold())
+    return "".join(c for c in decomposed if not unicodedata.combining(c))
+
+
+def build_terms(product):
+    weights = Counter()
+    for field, weight in FIELD_WEIGHTS.items():
+        for token in TOKEN_RE.findall(normalize(getattr(product, field))):
+            if len(token) > 1 or not token.isascii():
+                weights[token[:TERM_MAX_LENGTH]] += weight
+    return weights.items()
+
+
+def reindex(apps, schema_editor):
+    Product = apps.get_model('products', 'Product')
+    ProductSearchTerm = apps.get_model('products', 'ProductSearchTerm')
+
+    ProductSearchTerm.objects.all().delete()
+    rows = []
+    for product in Product.objects.only('id', 'title', 'description', 'brand').iterator():
+        for term, weight in build_terms(product):
+            rows.append(ProductSearchTerm(product_id=product.pk, term=term, weight=weight))
+        if len(rows) >= 1000:
+            ProductSearchTerm.objects.bulk_create(rows)
+            rows = []
+    ProductSearchTerm.objects.bulk_create(rows)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('products', '0011_rebuild_catalog_facets'),
+    ]
+
+    operations = [
+        migrations.RunPython(reindex, migrations.RunPython.noop),
+    ]
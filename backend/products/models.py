@@ -1,5 +1,7 @@
-from django.db import models
-from accounts.models import SellerProfile
+from django.db import models, transaction
+from django.db.models import ExpressionWrapper, F, Q, Value
+from django.db.models.functions import Concat, Substr
+from accounts.models import CustomerProfile, SellerProfile
 
 class Category(models.Model):
     name = models.CharField(max_length=100)
@@ -10,13 +12,77 @@ class Category(models.Model):
         on_delete=models.SET_NULL
     )
     is_active = models.BooleanField(default=True)
+    # Materialized path of ancestor ids including self, e.g. "/1/5/12/".
+    # A subtree is every row whose path starts with the root's path.
+    path = models.CharField(max_length=255, db_index=True, editable=False, default='')
+    depth = models.PositiveSmallIntegerField(default=0, editable=False)
 
     def __str__(self):
         return self.name
-    
+
+    def build_path(self):
+        parent_path = self.parent.path if self.parent_id else '/'
+        return f"{parent_path}{self.pk}/"
+
+    def descendants(self, include_self=True):
+        queryset = Category.objects.filter(path__startswith=self.path)
+        if not include_self:
+            queryset = queryset.exclude(pk=self.pk)
+        return queryset
+
+    def save(self, *args, **kwargs):
+        if self.pk and self.parent_id and self.path and self.parent.path.startswith(self.path):
+            raise ValueError("A category cannot be moved under its own subtree")
+
+        old_path, old_depth = self.path, self.depth
+        with transaction.atomic():
+            super().save(*args, **kwargs)
+
+            new_path = self.build_path()
+            new_depth = new_path.count('/') - 2
+            if new_path != old_path:
+                Category.objects.filter(pk=self.pk).update(path=new_path, depth=new_depth)
+                if old_path:
+                    # Moved: rewrite the prefix of the whole subtree in one UPDATE
+                    Category.objects.filter(path__startswith=old_path).exclude(pk=self.pk).update(
+                        path=Concat(Value(new_path), Substr('path', len(old_path) + 1)),
+                        depth=F('depth') + (new_depth - old_depth),
+                    )
+                self.path, self.depth = new_path, new_depth
+
+            if not self.is_active:
+                self.descendants(include_self=False).filter(is_active=True).update(is_active=False)
+
+LISTABLE = Q(is_active=True, seller_verified=True, stock_quantity__gt=0)
+
+
+class ProductQuerySet(models.QuerySet):
+    def with_images(self):
+        return self.prefetch_related('productimage_set')
+
+    def listable(self):
+        return self.filter(is_listable=True)
+
+    def refresh_listable(self):
+        """Recompute is_listable in SQL after bulk / F() updates."""
+        return self.update(is_listable=ExpressionWrapper(LISTABLE, output_field=models.BooleanField()))
+
+    def set_seller_verified(self, seller_ids, is_verified):
+        listable = False
+        if is_verified:
+            listable = ExpressionWrapper(
+                Q(is_active=True, stock_quantity__gt=0), output_field=models.BooleanField()
+            )
+        return self.filter(seller_id__in=seller_ids).update(
+            seller_verified=is_verified, is_listable=listable
+        )
+
+
 class Product(models.Model):
     seller = models.ForeignKey(SellerProfile, on_delete=models.CASCADE)
     category = models.ForeignKey(Category, on_delete=models.PROTECT)
+    # Seller-assigned stock keeping unit; key for bulk imports
+    sku = models.CharField(max_length=64, null=True, blank=True)
     title = models.CharField(max_length=255)
     description = models.TextField()
     price = models.DecimalField(max_digits=10, decimal_places=2)
@@ -24,11 +90,124 @@ class Product(models.Model):
     brand = models.CharField(max_length=100, blank=True)
     is_active = models.BooleanField(default=True)
     created_at = models.DateTimeField(auto_now_add=True)
+    # Denormalized browse projection: seller.is_verified copied onto the row,
+    # and is_listable = active AND seller verified AND in stock, so browse
+    # is a range scan on one table instead of a join against SellerProfile.
+    seller_verified = models.BooleanField(default=False, editable=False)
+    is_listable = models.BooleanField(default=False, editable=False)
+
+    objects = ProductQuerySet.as_manager()
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['created_at', 'id'], name='product_created_id_idx'),
+            models.Index(fields=['is_listable', 'created_at', 'id'], name='product_listable_recent_idx'),
+            models.Index(fields=['is_listable', 'price', 'id'], name='product_listable_price_idx'),
+            models.Index(fields=['seller', 'is_active', 'stock_quantity'], name='product_seller_stock_idx'),
+        ]
+        constraints = [
+            models.UniqueConstraint(fields=['seller', 'sku'], name='unique_seller_sku'),
+        ]
 
     def __str__(self):
         return self.title
 
+    def refresh_listable(self):
+        self.is_listable = bool(self.is_active and self.seller_verified and self.stock_quantity > 0)
+
+    def save(self, *args, **kwargs):
+        if self._state.adding:
+            self.seller_verified = self.seller.is_verified
+        self.refresh_listable()
+        if kwargs.get('update_fields') is not None:
+            kwargs['update_fields'] = set(kwargs['update_fields']) | {'is_listable'}
+        super().save(*args, **kwargs)
+
 
 class ProductImage(models.Model):
+    PENDING = 'PENDING'
+    READY = 'READY'
+    FAILED = 'FAILED'
+    STATUS_CHOICES = [
+        (PENDING, 'Pending'),
+        (READY, 'Ready'),
+        (FAILED, 'Failed'),
+    ]
+
     product = models.ForeignKey(Product, on_delete=models.CASCADE)
     image_url = models.TextField()
+    # sha256 of the original upload; identical files share storage and variants
+    content_hash = models.CharField(max_length=64, blank=True, db_index=True)
+    thumbnail_url = models.TextField(blank=True)
+    listing_url = models.TextField(blank=True)
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default=READY)
+
+
+class ProductSearchTerm(models.Model):
+    """Inverted index row: one (term, product) pair with its summed field weight."""
+    TERM_MAX_LENGTH = 64
+
+    product = models.ForeignKey(
+        Product,
+        on_delete=models.CASCADE,
+        related_name='search_terms'
+    )
+    term = models.CharField(max_length=TERM_MAX_LENGTH)
+    weight = models.PositiveIntegerField(default=1)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['term', 'product'], name='product_search_term_idx'),
+        ]
+
+
+class CatalogFacet(models.Model):
+    """
+    Precomputed facet counts for the browse page, kept up to date
+    incrementally by products.facets instead of a GROUP BY per request.
+    """
+    BRAND = 'BRAND'
+    CATEGORY = 'CATEGORY'
+    PRICE = 'PRICE'
+    FACET_CHOICES = [
+        (BRAND, 'Brand'),
+        (CATEGORY, 'Category'),
+        (PRICE, 'Price'),
+    ]
+
+    facet = models.CharField(max_length=10, choices=FACET_CHOICES)
+    value = models.CharField(max_length=100)
+    # Active products from verified sellers
+    product_count = models.IntegerField(default=0)
+    # ... of which currently have stock
+    in_stock_count = models.IntegerField(default=0)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['facet', 'value'], name='unique_catalog_facet'),
+        ]
+
+    def __str__(self):
+        return f"{self.facet}={self.value}"
+
+
+class StockHold(models.Model):
+    """
+    Units set aside for a customer on the way to checkout. They count
+    against Product.stock_quantity for everyone else until ``expires_at``
+    but aren't subtracted from it, so deleting a hold (expiry, cascade)
+    never has stock to hand back; see products.holds.
+    """
+    customer = models.ForeignKey(CustomerProfile, on_delete=models.CASCADE, related_name='stock_holds')
+    product = models.ForeignKey(Product, on_delete=models.CASCADE, related_name='holds')
+    quantity = models.PositiveIntegerField()
+    expires_at = models.DateTimeField()
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['customer', 'product'], name='unique_customer_product_hold'),
+        ]
+        indexes = [
+            models.Index(fields=['expires_at', 'id'], name='stock_hold_expires_idx'),
+        ]
@@ -0,0 +1,83 @@
+import re
+import unicodedata
+from collections import Counter
+
+from django.db import transaction
+from django.db.models import Count, Sum
+
+from .models import ProductSearchTerm
+
+TOKEN_RE = re.compile(r"\w+")
+
+# Weight of a term occurrence per indexed field.
+FIELD_WEIGHTS = {
+    "title": 3,
+    "brand": 2,
+    "description": 1,
+}
+
+MAX_QUERY_TERMS = 10
+
+
+def normalize(text):
+    """Case- and accent-fold: "Café NESTLÉ" -> "cafe nestle"."""
+    decomposed = unicodedata.normalize("NFKD", (text or "").casefold())
+    return "".join(c for c in decomposed if not unicodedata.combining(c))
+
+
+def tokenize(text):
+    # Single ASCII characters are noise; a single CJK character is a word
+    return [
+        token[:ProductSearchTerm.TERM_MAX_LENGTH]
+        for token in TOKEN_RE.findall(normalize(text))
+        if len(token) > 1 or not token.isascii()
+    ]
+
+
+def build_terms(product):
+    weights = Counter()
+    for field, weight in FIELD_WEIGHTS.items():
+        for term in tokenize(getattr(product, field)):
+            weights[term] += weight
+    return [
+        ProductSearchTerm(product_id=product.pk, term=term, weight=weight)
+        for term, weight in weights.items()
+    ]
+
+
+def index_products(products):
+    products = list(products)
+    if not products:
+        return
+
+    rows = []
+    for product in products:
+        rows.extend(build_terms(product))
+
+    with transaction.atomic():
+        ProductSearchTerm.objects.filter(
+            product_id__in=[p.pk for p in products]
+        ).delete()
+        ProductSearchTerm.objects.bulk_create(rows, batch_size=1000)
+
+
+def index_product(product):
+    index_products([product])
+
+
+def search_products(queryset, query):
+    """
+    Restrict ``queryset`` to products matching every term of ``query``
+    and order them by summed term weight (best match first).
+    """
+    terms = list(dict.fromkeys(tokenize(query)))[:MAX_QUERY_TERMS]
+    if not terms:
+        return queryset.none()
+
+    return (
+        queryset
+        .filter(search_terms__term__in=terms)
+        .annotate(matched=Count("search_terms"), relevance=Sum("search_terms__weight"))
+        .filter(matched=len(terms))
+        .order_by("-relevance", "-id")
+    )
@@ -9,7 +9,7 @@ class CategorySerializer(serializers.ModelSerializer):
 class ProductImageSerializer(serializers.ModelSerializer):
     class Meta:
         model = ProductImage
-        fields = ['image_url']
+        fields = ['image_url', 'thumbnail_url', 'listing_url']
 
 class ProductSerializer(serializers.ModelSerializer):
     images = ProductImageSerializer(many=True, source='productimage_set', read_only=True)
@@ -19,5 +19,53 @@ class ProductSerializer(serializers.ModelSerializer):
         fields = '__all__'
         read_only_fields = ['seller']
 
+    def validate_sku(self, value):
+        # Blank SKUs are stored as NULL so they don't collide on (seller, sku)
+        value = value or None
+        seller = self.instance.seller if self.instance else self.context.get('seller')
+        if value and seller is not None:
+            others = Product.objects.filter(seller=seller, sku=value)
+            if self.instance:
+                others = others.exclude(pk=self.instance.pk)
+            if others.exists():
+                raise serializers.ValidationError("You already have a product with this SKU")
+        return value
 
 
+class ProductImportSerializer(ProductSerializer):
+    """
+    ProductSerializer rules for one import row. The category is checked
+    against ids preloaded by the importer (``context['category_ids']``)
+    instead of one lookup per row.
+    """
+    sku = serializers.CharField(max_length=64)
+    category = serializers.IntegerField()
+
+    class Meta(ProductSerializer.Meta):
+        fields = ['sku', 'title', 'description', 'price', 'stock_quantity', 'brand', 'category']
+
+    def validate_sku(self, value):
+        # Imports upsert by SKU, so an existing SKU is an update, not a clash
+        return value
+
+    def validate_category(self, value):
+        if value not in self.context['category_ids']:
+            raise serializers.ValidationError("Invalid category")
+        return value
+
+
+
+
+class ProductStockPriceSerializer(serializers.Serializer):
+    """One entry of a seller's batch price / stock update."""
+    id = serializers.IntegerField()
+    price = serializers.DecimalField(max_digits=10, decimal_places=2, min_value=0, required=False)
+    stock_quantity = serializers.IntegerField(min_value=0, required=False)
+    stock_delta = serializers.IntegerField(required=False)
+
+    def validate(self, data):
+        if 'stock_quantity' in data and 'stock_delta' in data:
+            raise serializers.ValidationError("Send either stock_quantity or stock_delta, not both")
+        if not {'price', 'stock_quantity', 'stock_delta'} & set(data):
+            raise serializers.ValidationError("Nothing to update")
+        return data
@@ -0,0 +1,68 @@
+from django.db.models.signals import post_delete, post_save, pre_delete, pre_save
+from django.dispatch import receiver
+
+from accounts.models import SellerProfile
+from . import cache, facets, listing
+from .models import Category, Product, ProductImage
+from .search import FIELD_WEIGHTS, index_product
+
+
+@receiver(post_save, sender=Product)
+def reindex_product(sender, instance, update_fields=None, **kwargs):
+    # Stock / price only saves don't touch the indexed text
+    if update_fields is not None and not set(update_fields) & set(FIELD_WEIGHTS):
+        return
+    index_product(instance)
+
+
+@receiver(pre_save, sender=Product)
+@receiver(pre_delete, sender=Product)
+def snapshot_product_facets(sender, instance, **kwargs):
+    instance._facet_snapshot = facets.snapshot(instance.pk) if instance.pk else None
+
+
+@receiver(post_save, sender=Product)
+def update_product_facets(sender, instance, **kwargs):
+    old = getattr(instance, '_facet_snapshot', None)
+    facets.record_change([old] if old else [], [facets.snapshot(instance.pk)])
+
+
+@receiver(post_delete, sender=Product)
+def remove_product_facets(sender, instance, **kwargs):
+    old = getattr(instance, '_facet_snapshot', None)
+    if old:
+        facets.record_change([old], [])
+
+
+@receiver(pre_save, sender=SellerProfile)
+def remember_seller_verification(sender, instance, **kwargs):
+    instance._was_verified = (
+        SellerProfile.objects.filter(pk=instance.pk).values_list('is_verified', flat=True).first()
+        if instance.pk else None
+    )
+
+
+@receiver(post_save, sender=SellerProfile)
+def update_seller_listing(sender, instance, created, **kwargs):
+    was_verified = bool(getattr(instance, '_was_verified', None))
+    if instance.is_verified != was_verified:
+        listing.seller_verification_changed([instance.pk], instance.is_verified)
+
+
+@receiver(post_save, sender=Product)
+@receiver(post_delete, sender=Product)
+@receiver(post_save, sender=ProductImage)
+@receiver(post_delete, sender=ProductImage)
+@receiver(post_save, sender=Category)
+@receiver(post_delete, sender=Category)
+def invalidate_catalog_cache(sender, **kwargs):
+    cache.bump_version()
+
+
+@receiver(pre_delete, sender=Category)
+def detach_child_categories(sender, instance, **kwargs):
+    # The FK is SET_NULL; re-root children through save() so their
+    # subtree paths are rewritten too.
+    for child in Category.objects.filter(parent=instance):
+        child.parent = None
+        child.save()
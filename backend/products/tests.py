@@ -1,3 +1,611 @@
-from django.test import TestCase
+import base64
+import importlib
+import io
+import json
+import os
+import shutil
+import tempfile
+from unittest import mock, skipIf
 
-# Create your tests here.
+from django.apps import apps as django_apps
+from django.core.cache import cache
+from django.core.files.uploadedfile import SimpleUploadedFile
+from rest_framework.test import APITestCase
+
+from accounts.models import CustomerProfile, SellerProfile, User
+from backend.testing import QueryCountMixin
+from orders.models import Order, OrderItem
+from . import cache as catalog_cache
+from . import facets, images, listing
+from .models import CatalogFacet, Category, Product, ProductImage
+
+
+def make_seller(email='seller@example.com', is_verified=True):
+    user = User.objects.create_user(email, 'pass', role='SELLER')
+    return SellerProfile.objects.create(user=user, store_name='Store', is_verified=is_verified)
+
+
+def make_product(seller, category, **fields):
+    values = {
+        'title': 'Product',
+        'description': '',
+        'price': 100,
+        'stock_quantity': 5,
+    }
+    values.update(fields)
+    return Product.objects.create(seller=seller, category=category, **values)
+
+
+class ProductReadQueryTests(QueryCountMixin, APITestCase):
+    def setUp(self):
+        self.user = User.objects.create_user('seller@example.com', 'pass', role='SELLER')
+        self.seller = SellerProfile.objects.create(
+            user=self.user, store_name='Store', is_verified=True
+        )
+        self.category = Category.objects.create(name='Electronics')
+
+    def grow_products(self, size):
+        for i in range(Product.objects.count(), size):
+            product = Product.objects.create(
+                seller=self.seller,
+                category=self.category,
+                title=f'Phone {i}',
+                description='A phone',
+                price=100 + i,
+                stock_quantity=5,
+                brand='Acme',
+            )
+            ProductImage.objects.create(product=product, image_url=f'img-{i}-a.jpg')
+            ProductImage.objects.create(product=product, image_url=f'img-{i}-b.jpg')
+
+    def test_browse_query_count_is_constant(self):
+        self.assertConstantQueries(
+            self.grow_products,
+            lambda: self.client.get('/api/products/browse/', {'page_size': 50, 'cursor': ''}),
+        )
+
+    def test_browse_search_query_count_is_constant(self):
+        self.assertConstantQueries(
+            self.grow_products,
+            lambda: self.client.get('/api/products/browse/', {'q': 'phone'}),
+            sizes=(1, 5, 10),
+        )
+
+    def test_seller_products_query_count_is_constant(self):
+        self.client.force_authenticate(self.user)
+        self.assertConstantQueries(
+            self.grow_products,
+            lambda: self.client.get('/api/products/seller/products/'),
+        )
+
+
+class ProductSearchTests(APITestCase):
+    def setUp(self):
+        cache.clear()
+        self.seller = make_seller()
+        self.category = Category.objects.create(name='Electronics')
+
+    def search(self, query):
+        response = self.client.get('/api/products/browse/', {'q': query})
+        return [row['title'] for row in response.data['results']]
+
+    def test_every_term_must_match(self):
+        make_product(self.seller, self.category, title='Red phone')
+        make_product(self.seller, self.category, title='Blue phone')
+        make_product(self.seller, self.category, title='Red shirt')
+
+        self.assertEqual(self.search('red phone'), ['Red phone'])
+        self.assertEqual(self.search('green phone'), [])
+
+    def test_title_matches_rank_above_description_matches(self):
+        make_product(self.seller, self.category, title='Case', description='Fits any phone')
+        make_product(self.seller, self.category, title='Phone', description='')
+        make_product(self.seller, self.category, title='Charger', brand='Phone')
+
+        self.assertEqual(self.search('phone'), ['Phone', 'Charger', 'Case'])
+
+    def test_accents_and_case_are_folded(self):
+        make_product(self.seller, self.category, title='Café Nestlé')
+
+        self.assertEqual(self.search('nestle'), ['Café Nestlé'])
+        self.assertEqual(self.search('CAFÉ NESTLE'), ['Café Nestlé'])
+
+    def test_non_latin_text_is_indexed(self):
+        make_product(self.seller, self.category, title='Чайник электрический')
+        make_product(self.seller, self.category, title='緑 茶')
+
+        self.assertEqual(self.search('чайник'), ['Чайник электрический'])
+        self.assertEqual(self.search('茶'), ['緑 茶'])
+
+    def test_title_edit_reindexes(self):
+        product = make_product(self.seller, self.category, title='Red phone')
+        with self.captureOnCommitCallbacks(execute=True):
+            product.title = 'Blue tablet'
+            product.save()
+
+        self.assertEqual(self.search('phone'), [])
+        self.assertEqual(self.search('tablet'), ['Blue tablet'])
+
+
+class CatalogFacetTests(APITestCase):
+    def setUp(self):
+        cache.clear()
+        self.seller = make_seller()
+        self.category = Category.objects.create(name='Electronics')
+
+    def counts(self):
+        return {
+            (f.facet, f.value): (f.product_count, f.in_stock_count)
+            for f in CatalogFacet.objects.all()
+            if f.product_count or f.in_stock_count
+        }
+
+    def test_counts_follow_product_writes_and_match_a_rebuild(self):
+        phone = make_product(self.seller, self.category, brand='Acme', price=100)
+        make_product(self.seller, self.category, brand='Acme', price=700)
+        self.assertEqual(self.counts()[(CatalogFacet.BRAND, 'Acme')], (2, 2))
+
+        phone.stock_quantity = 0
+        phone.save()
+        self.assertEqual(self.counts()[(CatalogFacet.BRAND, 'Acme')], (2, 1))
+
+        phone.price = 600
+        phone.save()
+        self.assertNotIn((CatalogFacet.PRICE, '0-500'), self.counts())
+        self.assertEqual(self.counts()[(CatalogFacet.PRICE, '500-1000')], (2, 1))
+
+        phone.is_active = False
+        phone.save()
+        self.assertEqual(self.counts()[(CatalogFacet.BRAND, 'Acme')], (1, 1))
+
+        incremental = self.counts()
+        facets.rebuild()
+        self.assertEqual(self.counts(), incremental)
+
+    def test_drifted_counts_never_go_negative(self):
+        phone = make_product(self.seller, self.category, brand='Acme', price=100)
+        CatalogFacet.objects.all().delete()
+
+        phone.is_active = False
+        phone.save()
+        self.assertFalse(CatalogFacet.objects.filter(product_count__lt=0).exists())
+        self.assertFalse(CatalogFacet.objects.filter(in_stock_count__lt=0).exists())
+
+    def test_migration_backfills_an_existing_catalog(self):
+        make_product(self.seller, self.category, brand='Acme', price=100)
+        make_product(self.seller, self.category, brand='Acme', price=700, stock_quantity=0)
+        make_product(make_seller('other@example.com', is_verified=False), self.category, brand='Acme')
+        expected = self.counts()
+        CatalogFacet.objects.all().delete()
+
+        migration = importlib.import_module('products.migrations.0011_rebuild_catalog_facets')
+        migration.rebuild_catalog_facets(django_apps, None)
+        self.assertEqual(self.counts(), expected)
+        self.assertEqual(expected[(CatalogFacet.BRAND, 'Acme')], (2, 1))
+
+    def test_browse_returns_catalog_wide_facets(self):
+        make_product(self.seller, self.category, title='Phone', brand='Acme')
+        make_product(self.seller, self.category, title='Shirt', brand='Other')
+
+        response = self.client.get('/api/products/browse/', {'brand': 'Acme'})
+        self.assertEqual(len(response.data['results']), 1)
+        self.assertEqual(response.data['facets']['scope'], 'catalog')
+        self.assertEqual(len(response.data['facets']['brand']), 2)
+
+    def test_non_finite_price_is_rejected(self):
+        for value in ('NaN', 'Infinity', 'abc'):
+            response = self.client.get('/api/products/browse/', {'min_price': value})
+            self.assertEqual(response.status_code, 400, value)
+
+
+class BrowseCursorTests(APITestCase):
+    def setUp(self):
+        cache.clear()
+        seller = make_seller()
+        category = Category.objects.create(name='Electronics')
+        for i in range(5):
+            make_product(seller, category, title=f'Phone {i}')
+
+    def test_pages_cover_every_product_once(self):
+        titles = []
+        params = {'cursor': '', 'page_size': 2}
+        while True:
+            data = self.client.get('/api/products/browse/', params).data
+            titles += [row['title'] for row in data['results']]
+            if not data['next']:
+                break
+            params['cursor'] = data['next'].split('cursor=')[1].split('&')[0]
+        self.assertEqual(titles, [f'Phone {i}' for i in reversed(range(5))])
+
+    def test_malformed_cursor_is_not_found(self):
+        for values in (['not-a-date', 1], [{'a': 1}, 1], [1]):
+            cursor = base64.urlsafe_b64encode(json.dumps(values).encode()).decode()
+            response = self.client.get('/api/products/browse/', {'cursor': cursor})
+            self.assertEqual(response.status_code, 404, values)
+        self.assertEqual(self.client.get('/api/products/browse/', {'cursor': '!!'}).status_code, 404)
+
+
+class CategoryTreeTests(APITestCase):
+    def setUp(self):
+        self.root = Category.objects.create(name='Root')
+        self.branch = Category.objects.create(name='Branch', parent=self.root)
+        self.leaf = Category.objects.create(name='Leaf', parent=self.branch)
+        self.other = Category.objects.create(name='Other')
+
+    def reload(self, *categories):
+        for category in categories:
+            category.refresh_from_db()
+
+    def test_moving_a_category_rewrites_its_subtree(self):
+        self.branch.parent = self.other
+        self.branch.save()
+        self.reload(self.branch, self.leaf)
+
+        self.assertEqual(self.branch.path, f'/{self.other.pk}/{self.branch.pk}/')
+        self.assertEqual(self.leaf.path, f'/{self.other.pk}/{self.branch.pk}/{self.leaf.pk}/')
+        self.assertEqual((self.branch.depth, self.leaf.depth), (1, 2))
+        self.assertEqual(set(self.root.descendants()), {self.root})
+        self.assertEqual(set(self.other.descendants()), {self.other, self.branch, self.leaf})
+
+    def test_moving_under_own_subtree_is_rejected(self):
+        self.root.parent = self.leaf
+        with self.assertRaises(ValueError):
+            self.root.save()
+        self.reload(self.root, self.leaf)
+        self.assertEqual(self.root.path, f'/{self.root.pk}/')
+        self.assertEqual(self.leaf.path, f'/{self.root.pk}/{self.branch.pk}/{self.leaf.pk}/')
+
+    def test_deleting_a_category_re_roots_its_children(self):
+        self.branch.delete()
+        self.reload(self.leaf)
+        self.assertIsNone(self.leaf.parent_id)
+        self.assertEqual((self.leaf.path, self.leaf.depth), (f'/{self.leaf.pk}/', 0))
+
+    def test_deactivation_cascades_to_descendants(self):
+        self.root.is_active = False
+        self.root.save()
+        self.assertFalse(Category.objects.filter(pk__in=[self.branch.pk, self.leaf.pk], is_active=True).exists())
+        self.assertTrue(Category.objects.get(pk=self.other.pk).is_active)
+
+
+class CatalogCacheTests(APITestCase):
+    def setUp(self):
+        cache.clear()
+        self.product = make_product(make_seller(), Category.objects.create(name='Electronics'), title='Phone')
+
+    def test_repeat_browse_is_served_from_the_cache(self):
+        self.client.get('/api/products/browse/')
+        with self.assertNumQueries(0):
+            response = self.client.get('/api/products/browse/')
+        self.assertEqual(response.data['results'][0]['title'], 'Phone')
+
+    def test_write_bumps_the_version_only_on_commit(self):
+        self.client.get('/api/products/browse/')
+        version = catalog_cache.get_version()
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.product.title = 'Tablet'
+            self.product.save()
+            self.assertEqual(catalog_cache.get_version(), version)
+        self.assertGreater(catalog_cache.get_version(), version)
+
+        response = self.client.get('/api/products/browse/')
+        self.assertEqual(response.data['results'][0]['title'], 'Tablet')
+
+    def test_uncommitted_write_keeps_the_version(self):
+        version = catalog_cache.get_version()
+        with self.captureOnCommitCallbacks(execute=False) as callbacks:
+            self.product.save()
+        self.assertTrue(callbacks)
+        self.assertEqual(catalog_cache.get_version(), version)
+
+
+class ConditionalGetTests(APITestCase):
+    def setUp(self):
+        cache.clear()
+        self.category = Category.objects.create(name='Electronics')
+        self.product = make_product(make_seller(), self.category, title='Phone')
+
+    def assertRevalidates(self, url):
+        first = self.client.get(url)
+        self.assertEqual(first.status_code, 200)
+        etag = first['ETag']
+
+        self.assertEqual(self.client.get(url, HTTP_IF_NONE_MATCH=etag).status_code, 304)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.product.price = 120
+            self.product.save()
+
+        fresh = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(fresh.status_code, 200)
+        self.assertNotEqual(fresh['ETag'], etag)
+
+    def test_browse_revalidates(self):
+        self.assertRevalidates('/api/products/browse/')
+
+    def test_category_tree_revalidates(self):
+        self.assertRevalidates('/api/products/categories/tree/')
+
+    def test_not_modified_costs_no_queries(self):
+        etag = self.client.get('/api/products/categories/')['ETag']
+        with self.assertNumQueries(0):
+            response = self.client.get('/api/products/categories/', HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+
+
+class SellerProductImportTests(APITestCase):
+    def setUp(self):
+        cache.clear()
+        self.category = Category.objects.create(name='Electronics')
+        self.seller = make_seller()
+        self.client.force_authenticate(self.seller.user)
+
+    def upload(self, content, name='products.csv'):
+        return self.client.post(
+            '/api/products/seller/products/import/',
+            {'file': SimpleUploadedFile(name, content)},
+            format='multipart',
+        )
+
+    def csv(self, *rows):
+        lines = ['sku,title,description,price,stock_quantity,category']
+        lines += [','.join(str(v) for v in row) for row in rows]
+        return '\n'.join(lines).encode()
+
+    def test_valid_rows_are_imported_and_bad_rows_reported(self):
+        response = self.upload(self.csv(
+            ('A-1', 'Phone', 'x', 100, 3, self.category.id),
+            ('A-2', 'Case', 'x', 'cheap', 3, self.category.id),
+            ('A-3', 'Cable', 'x', 10, 1, 999999),
+        ))
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual((response.data['created'], response.data['failed']), (1, 2))
+        self.assertEqual([e['row'] for e in response.data['errors']], [2, 3])
+        self.assertEqual(list(Product.objects.values_list('sku', flat=True)), ['A-1'])
+
+    def test_repeated_skus_upsert(self):
+        make_product(self.seller, self.category, sku='A-1', title='Old')
+        response = self.upload(self.csv(
+            ('A-1', 'Phone', 'x', 100, 3, self.category.id),
+            ('A-2', 'Case', 'x', 5, 3, self.category.id),
+            ('A-2', 'Case v2', 'x', 6, 3, self.category.id),
+        ))
+        self.assertEqual((response.data['created'], response.data['updated']), (1, 1))
+        self.assertEqual(
+            dict(Product.objects.values_list('sku', 'title')),
+            {'A-1': 'Phone', 'A-2': 'Case v2'},
+        )
+
+    def test_undecodable_file_is_rejected(self):
+        content = self.csv(('A-1', 'Phone', 'x', 100, 3, self.category.id))
+        content += '\nA-2,Caf\xe9,x,5,3,{}'.format(self.category.id).encode('latin-1')
+        response = self.upload(content)
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('UTF-8', response.data['error'])
+
+    def test_duplicate_sku_on_create_is_a_validation_error(self):
+        make_product(self.seller, self.category, sku='A-1')
+        response = self.client.post('/api/products/seller/products/', {
+            'sku': 'A-1', 'title': 'Phone', 'description': 'x', 'price': 100,
+            'stock_quantity': 1, 'category': self.category.id,
+        })
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('sku', response.data)
+
+
+class SellerBatchUpdateTests(APITestCase):
+    url = '/api/products/seller/products/batch-update/'
+
+    def setUp(self):
+        cache.clear()
+        self.category = Category.objects.create(name='Electronics')
+        self.seller = make_seller()
+        self.phone = make_product(self.seller, self.category, title='Phone', stock_quantity=5)
+        self.case = make_product(self.seller, self.category, title='Case', stock_quantity=2)
+        self.client.force_authenticate(self.seller.user)
+
+    def test_each_entry_gets_its_own_result(self):
+        other = make_product(make_seller('other@example.com'), self.category)
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.client.post(self.url, {'items': [
+                {'id': self.phone.id, 'price': '90.00', 'stock_delta': -2},
+                {'id': self.case.id, 'stock_delta': -3},
+                {'id': other.id, 'stock_quantity': 1},
+                {'id': self.phone.id},
+            ]}, format='json')
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual((response.data['updated'], response.data['failed']), (1, 3))
+        statuses = {(r['id'], r['status']) for r in response.data['results']}
+        self.assertEqual(statuses, {
+            (self.phone.id, 'invalid'),
+            (self.phone.id, 'ok'),
+            (self.case.id, 'insufficient_stock'),
+            (other.id, 'not_found'),
+        })
+        self.phone.refresh_from_db()
+        self.case.refresh_from_db()
+        self.assertEqual((self.phone.price, self.phone.stock_quantity), (90, 3))
+        self.assertEqual(self.case.stock_quantity, 2)
+        other.refresh_from_db()
+        self.assertEqual(other.stock_quantity, 5)
+
+    def test_selling_out_updates_listability(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.post(self.url, {'items': [{'id': self.case.id, 'stock_quantity': 0}]}, format='json')
+        self.case.refresh_from_db()
+        self.assertFalse(self.case.is_listable)
+
+    def test_non_object_body_is_rejected(self):
+        response = self.client.post(self.url, [{'id': self.phone.id, 'price': '1.00'}], format='json')
+        self.assertEqual(response.status_code, 400)
+
+
+class InlineExecutor:
+    """Runs submitted work straight away, so image processing is synchronous in tests."""
+    def submit(self, fn, *args):
+        fn(*args)
+
+
+class ProductImageUploadTests(APITestCase):
+    def setUp(self):
+        self.media_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.media_root)
+        settings_override = self.settings(MEDIA_ROOT=self.media_root)
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+        # Run the worker inline, and keep it from closing the test's connection
+        for patcher in (
+            mock.patch.object(images, 'get_executor', return_value=InlineExecutor()),
+            mock.patch.object(images, 'close_old_connections'),
+        ):
+            patcher.start()
+            self.addCleanup(patcher.stop)
+
+        self.seller = make_seller()
+        self.product = make_product(self.seller, Category.objects.create(name='Electronics'))
+        self.client.force_authenticate(self.seller.user)
+
+    def upload(self, content, name='photo.png'):
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.client.post(
+                f'/api/products/upload-image/{self.product.id}/',
+                {'image': SimpleUploadedFile(name, content)},
+                format='multipart',
+            )
+        self.assertEqual(response.status_code, 201)
+        return ProductImage.objects.get(pk=response.data['id'])
+
+    def stored_files(self):
+        return sorted(
+            os.path.relpath(os.path.join(root, name), self.media_root)
+            for root, _, names in os.walk(self.media_root) for name in names
+        )
+
+    @mock.patch.object(images, 'Image', None)
+    def test_without_pillow_the_original_is_served(self):
+        with self.assertLogs('products.images', 'WARNING'):
+            image = self.upload(b'not really a png')
+
+        self.assertEqual(image.status, ProductImage.READY)
+        self.assertEqual(image.thumbnail_url, image.image_url)
+        self.assertEqual(image.listing_url, image.image_url)
+        # Only the content-addressed original is left; the temp file was moved
+        path = images.relative_path(image.content_hash, '.png')
+        self.assertEqual(self.stored_files(), [path])
+
+    @skipIf(images.Image is None, "Pillow is not installed")
+    def test_variants_are_generated_and_reused(self):
+        buffer = io.BytesIO()
+        images.Image.new('RGB', (1200, 800), 'red').save(buffer, 'PNG')
+
+        first = self.upload(buffer.getvalue())
+        self.assertEqual(first.status, ProductImage.READY)
+        with images.Image.open(os.path.join(self.media_root, first.thumbnail_url[len('/media/'):])) as thumb:
+            self.assertEqual(thumb.size, (200, 133))
+
+        second = self.upload(buffer.getvalue())
+        self.assertEqual(second.thumbnail_url, first.thumbnail_url)
+        self.assertEqual(len(self.stored_files()), 3)
+
+    @mock.patch.object(images, 'Image', None)
+    def test_unsupported_extension_is_rejected(self):
+        response = self.client.post(
+            f'/api/products/upload-image/{self.product.id}/',
+            {'image': SimpleUploadedFile('notes.txt', b'hello')},
+            format='multipart',
+        )
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(self.stored_files(), [])
+
+
+class ListabilityTests(APITestCase):
+    def setUp(self):
+        cache.clear()
+        self.category = Category.objects.create(name='Electronics')
+        self.seller = make_seller(is_verified=False)
+        self.product = make_product(self.seller, self.category, title='Phone')
+
+    def browse_ids(self):
+        return [p['id'] for p in self.client.get('/api/products/browse/').data['results']]
+
+    def assertListed(self, listed):
+        self.product.refresh_from_db()
+        self.assertEqual(self.product.is_listable, listed)
+        self.assertEqual(self.browse_ids(), [self.product.id] if listed else [])
+
+    def test_verification_lists_and_unlists_products(self):
+        self.assertListed(False)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.seller.is_verified = True
+            self.seller.save()
+        self.assertListed(True)
+
+        # Bulk path used by the admin actions
+        with self.captureOnCommitCallbacks(execute=True):
+            SellerProfile.objects.filter(pk=self.seller.pk).update(is_verified=False)
+            listing.seller_verification_changed([self.seller.pk], False)
+        self.assertListed(False)
+
+    def test_deactivation_unlists_a_product(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            self.seller.is_verified = True
+            self.seller.save()
+        self.assertListed(True)
+
+        self.client.force_authenticate(self.seller.user)
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.client.delete(f'/api/products/seller/products/{self.product.id}/')
+        self.assertEqual(response.status_code, 204)
+        self.client.force_authenticate(None)
+        self.assertListed(False)
+
+
+class SellerDashboardTests(APITestCase):
+    url = '/api/products/seller/dashboard/'
+
+    def setUp(self):
+        category = Category.objects.create(name='Electronics')
+        self.seller = make_seller()
+        self.stock = {
+            level: make_product(self.seller, category, title=f'Stock {level}', stock_quantity=level)
+            for level in (0, 2, 5, 9)
+        }
+        make_product(self.seller, category, title='Gone', stock_quantity=1, is_active=False)
+        make_product(make_seller('other@example.com'), category, stock_quantity=1)
+
+        customer = CustomerProfile.objects.create(
+            user=User.objects.create_user('customer@example.com', 'pass', role='CUSTOMER')
+        )
+        order = Order.objects.create(customer=customer, total_amount=300, shipping_address_id=1)
+        for item_status in ('PLACED', 'PLACED', 'SHIPPED', 'DELIVERED'):
+            OrderItem.objects.create(
+                order=order, product=self.stock[9], seller=self.seller,
+                quantity=1, price=100, status=item_status,
+            )
+        self.client.force_authenticate(self.seller.user)
+
+    def test_counts_cover_only_the_sellers_products(self):
+        response = self.client.get(self.url)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['products'], {
+            'active': 4, 'inactive': 1, 'out_of_stock': 1, 'low_stock': 2,
+        })
+        self.assertEqual(response.data['open_order_items'], {'PLACED': 2, 'SHIPPED': 1})
+
+    def test_low_stock_threshold(self):
+        response = self.client.get(self.url, {'low_stock_threshold': 2})
+        self.assertEqual(response.data['low_stock_threshold'], 2)
+        self.assertEqual(response.data['products']['low_stock'], 1)
+        self.assertEqual([p['id'] for p in response.data['low_stock_items']], [self.stock[2].id])
+
+        response = self.client.get(self.url, {'low_stock_threshold': 10})
+        self.assertEqual(
+            [p['stock_quantity'] for p in response.data['low_stock_items']], [2, 5, 9]
+        )
+
+    def test_invalid_threshold_is_rejected(self):
+        response = self.client.get(self.url, {'low_stock_threshold': 'few'})
+        self.assertEqual(response.status_code, 400)
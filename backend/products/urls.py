@@ -1,11 +1,16 @@
 from django.urls import path
-from .views import ProductListView, SellerProductView, SellerProductDetailView, CategoryListView
+from .views import ProductListView, SellerProductView, SellerProductDetailView, SellerProductImportView, SellerProductBatchUpdateView, SellerDashboardView, CategoryListView, CategoryTreeView, ProductImageUploadView
 
 urlpatterns = [
     path('browse/', ProductListView.as_view()),
     path('seller/products/', SellerProductView.as_view()),
+    path('seller/dashboard/', SellerDashboardView.as_view()),
+    path('seller/products/import/', SellerProductImportView.as_view()),
+    path('seller/products/batch-update/', SellerProductBatchUpdateView.as_view()),
     path('seller/products/<int:pk>/', SellerProductDetailView.as_view()),
     path('categories/', CategoryListView.as_view()),
+    path('categories/tree/', CategoryTreeView.as_view()),
+    path('upload-image/<int:product_id>/', ProductImageUploadView.as_view()),
 
 
 ]
@@ -4,24 +4,103 @@ from rest_framework.permissions import IsAuthenticated
 from .models import Product
 from .serializers import ProductSerializer, CategorySerializer, Category, ProductImageSerializer
 from rest_framework.generics import RetrieveUpdateDestroyAPIView
-from rest_framework.filters import SearchFilter, OrderingFilter
 from rest_framework.pagination import PageNumberPagination
 import rest_framework.status as status
+import os
+from django.shortcuts import get_object_or_404
+from django.utils.decorators import method_decorator
+from django.views.decorators.http import condition
+from .search import search_products
+from . import facets
+from . import cache as catalog_cache
+from decimal import Decimal, InvalidOperation
+from django.db.models import Count, Q
+from orders.models import OrderItem
+from backend.pagination import KeysetPagination
+from .images import ALLOWED_EXTENSIONS, add_product_image
+from .batch import MAX_BATCH_SIZE, apply_stock_price_updates
+from .importer import FORMATS, ProductImporter, detect_format, read_rows
 
 
 
+catalog_conditional = condition(
+    etag_func=catalog_cache.etag,
+    last_modified_func=catalog_cache.last_modified,
+)
+
+OPEN_ORDER_STATUSES = ('PLACED', 'SHIPPED')
+
+# Each ordering is backed by an (is_listable, ...) index on Product
+BROWSE_ORDERINGS = {
+    'newest': ('-created_at', '-id'),
+    'price_asc': ('price', 'id'),
+    'price_desc': ('-price', '-id'),
+}
+
+
 class ProductListView(APIView):
+    @method_decorator(catalog_conditional)
     def get(self, request):
-        # Filter products
-        products = Product.objects.filter(
-            is_active=True,
-            stock_quantity__gt=0,
-            seller__is_verified=True
-        )
+        return catalog_cache.cached_response(request, lambda: self.list(request))
+
+    def list(self, request):
+        params = request.query_params
+
+        ordering = BROWSE_ORDERINGS.get(params.get('ordering', 'newest'))
+        if ordering is None:
+            return Response({"error": "Invalid ordering"}, status=status.HTTP_400_BAD_REQUEST)
+
+        # In-stock only unless explicitly asked for sold-out items too.
+        # The in-stock case reads the denormalized is_listable flag only.
+        in_stock = params.get('in_stock', 'true').lower() not in ('0', 'false')
+        if in_stock:
+            products = Product.objects.with_images().listable()
+        else:
+            products = Product.objects.with_images().filter(is_active=True, seller_verified=True)
+
+        category_id = params.get('category')
+        if category_id:
+            if not category_id.isdigit():
+                return Response({"error": "Invalid category"}, status=status.HTTP_400_BAD_REQUEST)
+            path = Category.objects.filter(pk=category_id).values_list('path', flat=True).first()
+            if path is None:
+                products = products.none()
+            else:
+                # Whole subtree via one range scan on the path index
+                products = products.filter(
+                    category_id__in=Category.objects.filter(path__startswith=path).values('id')
+                )
+
+        brands = [b for b in params.getlist('brand') if b]
+        if brands:
+            products = products.filter(brand__in=brands)
+
+        try:
+            min_price = Decimal(params['min_price']) if params.get('min_price') else None
+            max_price = Decimal(params['max_price']) if params.get('max_price') else None
+        except InvalidOperation:
+            return Response({"error": "Invalid price range"}, status=status.HTTP_400_BAD_REQUEST)
+        if any(p is not None and not p.is_finite() for p in (min_price, max_price)):
+            return Response({"error": "Invalid price range"}, status=status.HTTP_400_BAD_REQUEST)
+        if min_price is not None:
+            products = products.filter(price__gte=min_price)
+        if max_price is not None:
+            products = products.filter(price__lte=max_price)
+
+        # Full-text search over title / description / brand
+        query = params.get('q', '').strip()
+        if query:
+            products = search_products(products, query)
         
-        # Setup pagination
-        paginator = PageNumberPagination()
-        paginator.page_size = 10
+        # Setup pagination: keyset on the sort columns when a cursor is
+        # requested, page numbers otherwise (and always for relevance order)
+        if KeysetPagination.requested(request) and not query:
+            paginator = KeysetPagination(ordering=ordering)
+        else:
+            if not query:
+                products = products.order_by(*ordering)
+            paginator = PageNumberPagination()
+            paginator.page_size = 10
         
         # Paginate the filtered queryset
         result_page = paginator.paginate_queryset(products, request)
@@ -29,8 +108,10 @@ class ProductListView(APIView):
         # Serialize only the paginated results
         serializer = ProductSerializer(result_page, many=True)
         
-        # Return paginated response
-        return paginator.get_paginated_response(serializer.data)
+        # Return paginated response with the precomputed facet counts
+        response = paginator.get_paginated_response(serializer.data)
+        response.data['facets'] = facets.facet_counts(in_stock=in_stock)
+        return response
     
 class SellerProductView(APIView):
     permission_classes = [IsAuthenticated]
@@ -40,18 +121,9 @@ class SellerProductView(APIView):
             return Response({"error": "Not allowed"}, status=403)
 
         seller = request.user.sellerprofile
-        
-        # Debug counts
-        all_products = Product.objects.filter(seller=seller)
-        active_products = all_products.filter(is_active=True)
-        
-        print(f"🔍 Seller {seller.store_name}: {all_products.count()} total, {active_products.count()} active")
-        
-        # List all products
-        for p in all_products:
-            print(f"  - {p.id}: {p.title} | Active: {p.is_active}")
-        
+
         # Return only active products
+        active_products = Product.objects.with_images().filter(seller=seller, is_active=True)
         serializer = ProductSerializer(active_products, many=True)
         return Response(serializer.data)
 
@@ -60,11 +132,109 @@ class SellerProductView(APIView):
         if not seller.is_verified:
             return Response({"error": "Seller not verified"}, status=403)
 
-        serializer = ProductSerializer(data=request.data)
+        serializer = ProductSerializer(data=request.data, context={'seller': seller})
         serializer.is_valid(raise_exception=True)
         serializer.save(seller=seller,is_active=True)
         return Response(serializer.data, status=201)
     
+class SellerDashboardView(APIView):
+    permission_classes = [IsAuthenticated]
+
+    LOW_STOCK_THRESHOLD = 5
+    LOW_STOCK_LIMIT = 20
+
+    def get(self, request):
+        if request.user.role != 'SELLER':
+            return Response({"error": "Not allowed"}, status=403)
+
+        seller = request.user.sellerprofile
+        try:
+            threshold = int(request.query_params.get('low_stock_threshold', self.LOW_STOCK_THRESHOLD))
+        except ValueError:
+            return Response({"error": "Invalid low_stock_threshold"}, status=status.HTTP_400_BAD_REQUEST)
+
+        products = Product.objects.filter(seller=seller)
+
+        # All product counters in one aggregate query
+        counts = products.aggregate(
+            active=Count('id', filter=Q(is_active=True)),
+            inactive=Count('id', filter=Q(is_active=False)),
+            out_of_stock=Count('id', filter=Q(is_active=True, stock_quantity__lte=0)),
+            low_stock=Count('id', filter=Q(is_active=True, stock_quantity__gt=0, stock_quantity__lte=threshold)),
+        )
+
+        low_stock = list(
+            products.filter(is_active=True, stock_quantity__gt=0, stock_quantity__lte=threshold)
+            .order_by('stock_quantity', 'id')
+            .values('id', 'sku', 'title', 'stock_quantity')[:self.LOW_STOCK_LIMIT]
+        )
+
+        open_items = dict(
+            OrderItem.objects.filter(seller=seller, status__in=OPEN_ORDER_STATUSES)
+            .values_list('status')
+            .annotate(count=Count('id'))
+            .order_by()
+        )
+
+        return Response({
+            "products": counts,
+            "low_stock_threshold": threshold,
+            "low_stock_items": low_stock,
+            "open_order_items": {s: open_items.get(s, 0) for s in OPEN_ORDER_STATUSES},
+        })
+
+
+class SellerProductImportView(APIView):
+    permission_classes = [IsAuthenticated]
+
+    def post(self, request):
+        if request.user.role != 'SELLER':
+            return Response({"error": "Not allowed"}, status=403)
+
+        seller = request.user.sellerprofile
+        if not seller.is_verified:
+            return Response({"error": "Seller not verified"}, status=403)
+
+        upload = request.FILES.get("file")
+        if not upload:
+            return Response({"error": "File is required"}, status=status.HTTP_400_BAD_REQUEST)
+
+        fmt = detect_format(upload.name, request.data.get("format"))
+        if fmt not in FORMATS:
+            return Response({"error": "Unsupported format"}, status=status.HTTP_400_BAD_REQUEST)
+
+        result = ProductImporter(seller).run(read_rows(upload, fmt))
+        if result.get('error'):
+            return Response(result, status=status.HTTP_400_BAD_REQUEST)
+        return Response(result)
+    
+class SellerProductBatchUpdateView(APIView):
+    permission_classes = [IsAuthenticated]
+
+    def post(self, request):
+        if request.user.role != 'SELLER':
+            return Response({"error": "Not allowed"}, status=403)
+
+        seller = request.user.sellerprofile
+        if not seller.is_verified:
+            return Response({"error": "Seller not verified"}, status=403)
+
+        items = request.data.get("items") if isinstance(request.data, dict) else None
+        if not isinstance(items, list) or not items:
+            return Response({"error": "items must be a non-empty list"}, status=status.HTTP_400_BAD_REQUEST)
+        if len(items) > MAX_BATCH_SIZE:
+            return Response(
+                {"error": f"At most {MAX_BATCH_SIZE} items per request"},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+        updated, results = apply_stock_price_updates(seller, items)
+        return Response({
+            "updated": updated,
+            "failed": len(results) - updated,
+            "results": results,
+        })
+    
 class SellerProductDetailView(RetrieveUpdateDestroyAPIView):
     serializer_class = ProductSerializer
     permission_classes = [IsAuthenticated]
@@ -73,7 +243,7 @@ class SellerProductDetailView(RetrieveUpdateDestroyAPIView):
         if self.request.user.role != 'SELLER':
             return Product.objects.none()
         # Only allow access to ACTIVE products
-        return Product.objects.filter(
+        return Product.objects.with_images().filter(
             seller=self.request.user.sellerprofile,
             is_active=True
         )
@@ -97,21 +267,54 @@ class ProductPagination(PageNumberPagination):
 
 
 class CategoryListView(APIView):
+    @method_decorator(catalog_conditional)
     def get(self, request):
+        return catalog_cache.cached_response(request, lambda: self.list(request))
+
+    def list(self, request):
         categories = Category.objects.filter(is_active=True)
         serializer = CategorySerializer(categories, many=True)
         return Response(serializer.data)
 
+
+class CategoryTreeView(APIView):
+    @method_decorator(catalog_conditional)
+    def get(self, request):
+        return catalog_cache.cached_response(request, lambda: self.tree(request))
+
+    def tree(self, request):
+        # One query; ordering by depth guarantees parents come first
+        categories = Category.objects.filter(is_active=True).order_by('depth', 'name')
+
+        nodes = {}
+        roots = []
+        for category in categories:
+            node = {"id": category.id, "name": category.name, "children": []}
+            nodes[category.id] = node
+            if category.parent_id is None:
+                roots.append(node)
+            elif category.parent_id in nodes:
+                nodes[category.parent_id]["children"].append(node)
+
+        return Response(roots)
+
 class ProductImageUploadView(APIView):
     permission_classes = [IsAuthenticated]
 
     def post(self, request, product_id):
-        product = Product.objects.get(id=product_id, seller=request.user.sellerprofile)
+        if request.user.role != 'SELLER':
+            return Response({"error": "Not allowed"}, status=403)
+
+        product = get_object_or_404(Product, id=product_id, seller=request.user.sellerprofile)
         image = request.FILES.get("image")
+        if not image:
+            return Response({"message": "Image is required"}, status=status.HTTP_400_BAD_REQUEST)
+        if os.path.splitext(image.name)[1].lower() not in ALLOWED_EXTENSIONS:
+            return Response({"message": "Unsupported image type"}, status=status.HTTP_400_BAD_REQUEST)
 
-        # FIX: Use ProductImage model, not serializer
-        ProductImage.objects.create(
-            product=product,
-            image_url=image
+        # Stored now; thumbnail / listing sizes are generated in the background
+        product_image = add_product_image(product, image)
+        return Response(
+            {"message": "Image uploaded", "id": product_image.id, "status": product_image.status},
+            status=status.HTTP_201_CREATED
         )
-        return Response({"message": "Image uploaded"})
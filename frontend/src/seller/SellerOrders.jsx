@@ -3,14 +3,18 @@ import api from "../api/axios";
 
 export default function SellerOrders() {
   const [orders, setOrders] = useState([]);
+  const [nextPage, setNextPage] = useState(null);
   const [loading, setLoading] = useState(true);
   const [updatingStatus, setUpdatingStatus] = useState({});
   const [error, setError] = useState("");
 
   useEffect(() => {
     setLoading(true);
-    api.get("orders/seller-orders/")
-      .then(res => setOrders(res.data || []))
+    api.get("orders/seller-orders/", { params: { page_size: 50 } })
+      .then(res => {
+        setOrders(res.data.results || []);
+        setNextPage(res.data.next);
+      })
       .catch(() => {
         setOrders([]);
         setError("Failed to load orders");
@@ -18,6 +22,16 @@ export default function SellerOrders() {
       .finally(() => setLoading(false));
   }, []);
 
+  const loadMore = async () => {
+    try {
+      const res = await api.get(nextPage);
+      setOrders(prev => [...prev, ...(res.data.results || [])]);
+      setNextPage(res.data.next);
+    } catch (err) {
+      setError("Failed to load more orders");
+    }
+  };
+
   const updateStatus = async (id, status) => {
     if (!window.confirm(`Are you sure you want to mark this order as ${status.toLowerCase()}?`)) {
       return;
@@ -289,6 +303,14 @@ export default function SellerOrders() {
           </div>
         ))}
       </div>
+
+      {nextPage && (
+        <div style={styles.loadMoreContainer}>
+          <button onClick={loadMore} style={styles.loadMoreButton}>
+            Load more orders
+          </button>
+        </div>
+      )}
     </div>
   );
 }
@@ -550,6 +572,21 @@ const styles = {
   completedText: {
     fontSize: "14px",
   },
+  loadMoreContainer: {
+    display: "flex",
+    justifyContent: "center",
+    marginTop: "24px",
+  },
+  loadMoreButton: {
+    padding: "10px 24px",
+    borderRadius: "8px",
+    border: "1px solid #d1d5db",
+    backgroundColor: "white",
+    color: "#374151",
+    fontSize: "14px",
+    fontWeight: "600",
+    cursor: "pointer",
+  },
 };
 
 // Add CSS animation